@@ -1,12 +1,21 @@
 from asyncio import run
+from os import path as os_path
 
 from growtopia import (
     ItemsData,
+    PlayerTributeData,
 )
 
 
 def parse_file(path: str) -> None:
-    items_data = ItemsData.load(path)
+    if os_path.basename(path).startswith("player_tribute"):
+        player_tribute_data = PlayerTributeData.load(path)
+    else:
+        items_data = ItemsData.load(path)
+
+
+def cache_file(path: str, cache_path: str = "") -> None:
+    items_data = ItemsData.load_cached(path, cache_path=cache_path or None)
 
 
 async def main(*args):
@@ -18,10 +27,16 @@ async def main(*args):
                 raise ValueError("Missing file path")
 
             parse_file(args[1])
+        case "cache":
+            if len(args) < 2:
+                raise ValueError("Missing file path")
+
+            cache_file(*args[1:3])
         case "help":
             print(
                 """
 				growtopia parse <file_path> | Parse a file (items.dat or player_tribute.dat)
+				growtopia cache <file_path> [cache_path] | Create/refresh the snapshot of an items.dat file
 				growtopia help | Show this help message
 				"""
             )
@@ -1,6 +1,9 @@
 __all__ = ("HTTP",)
 
-from typing import Tuple
+from typing import (
+    Optional,
+    Tuple,
+)
 from urllib.parse import (
     urljoin,
 )
@@ -12,6 +15,7 @@ from aiohttp import (
 
 from growtopia.utils import (
     Buffer,
+    Hasher,
 )
 
 from .constants import (
@@ -30,6 +34,13 @@ class HTTP:
             async with session.get(path, **kwargs) as r:
                 return r, Buffer(bytearray(await r.read()))
 
+    @staticmethod
+    def _cdn_route(file_path: str, keep_path: bool, cdn_path: str) -> str:
+        if not keep_path and len(file_path.split("/")) == 1:
+            file_path = "game/" + file_path
+
+        return urljoin(cdn_path, file_path)
+
     @staticmethod
     async def fetch_file_from_cdn(
         file_path: str,
@@ -38,14 +49,9 @@ class HTTP:
         cdn_url: str = UBI_CDN,
         cdn_path: str = UBI_CDN_PATH,
     ) -> Buffer:
-        if not keep_path and len(file_path.split("/")) == 1:
-            file_path = "game/" + file_path
-
-        route = urljoin(cdn_path, file_path)
-
         r, buffer = await HTTP.get(
             cdn_url,
-            route,
+            HTTP._cdn_route(file_path, keep_path, cdn_path),
             headers={"User-Agent": UBI_PC32_USER_AGENT},
         )
 
@@ -53,3 +59,29 @@ class HTTP:
             return Buffer()
 
         return buffer
+
+    @staticmethod
+    async def hash_file_from_cdn(
+        file_path: str,
+        *,
+        keep_path: bool = False,
+        cdn_url: str = UBI_CDN,
+        cdn_path: str = UBI_CDN_PATH,
+        chunk_size: int = 1 << 16,
+    ) -> Optional[int]:
+        # Hashes the file as it's downloaded, without holding onto it. None if it couldn't be
+        # fetched (or is empty).
+        hasher = Hasher()
+
+        async with ClientSession(base_url=cdn_url) as session:
+            async with session.get(
+                HTTP._cdn_route(file_path, keep_path, cdn_path),
+                headers={"User-Agent": UBI_PC32_USER_AGENT},
+            ) as r:
+                if r.status != 200:
+                    return None
+
+                async for chunk in r.content.iter_chunked(chunk_size):
+                    hasher.update(chunk)
+
+        return hasher.digest() if hasher.size else None
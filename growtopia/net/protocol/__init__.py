@@ -1,2 +1,5 @@
+from .dispatcher import *
 from .enums import *
 from .packet import *
+from .text import *
+from .variant import *
@@ -0,0 +1,185 @@
+__all__ = ("PacketDispatcher",)
+
+from array import array
+from inspect import (
+    isawaitable,
+)
+from struct import Struct
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .enums import (
+    PacketType,
+    UpdateType,
+)
+from .packet import (
+    UPDATE_PACKET_EXTRA_DATA,
+    UPDATE_PACKET_HEADER,
+    MessagePacket,
+    Packet,
+    TextPacket,
+    UpdatePacket,
+)
+
+AnyPacket = Union[Packet, TextPacket, MessagePacket, UpdatePacket]
+PacketHandler = Callable[[AnyPacket], Union[None, Awaitable[None]]]
+
+PACKET_TYPE = Struct("<i")
+
+# An update packet's flags & extra data length, read without unpacking the rest of it.
+UPDATE_FLAGS = Struct(f"<{Struct('<i4b2i').size}xi")
+UPDATE_DATA_LENGTH = Struct(f"<{UPDATE_PACKET_HEADER.size}xI")
+
+# One route per packet type, except for update packets that get one per update type (the byte
+# right after the packet type). Anything that isn't a known packet type goes to UNKNOWN's.
+UNKNOWN_ROUTE = int(PacketType.UNKNOWN)
+UPDATE_ROUTE = int(PacketType.UPDATE)
+ROUTE_COUNT = UPDATE_ROUTE + 256
+
+
+def _decode_text(packet_type: PacketType) -> Callable[[memoryview], AnyPacket]:
+    packet_class = TextPacket if packet_type == PacketType.TEXT else MessagePacket
+    return lambda view: packet_class(packet_type, str(view[PACKET_TYPE.size :], "utf-8"))
+
+
+PACKET_DECODERS: Dict[int, Callable[[memoryview], AnyPacket]] = {
+    int(PacketType.UNKNOWN): lambda view: Packet(PacketType.UNKNOWN),
+    int(PacketType.HELLO): lambda view: Packet(PacketType.HELLO),
+    int(PacketType.TEXT): _decode_text(PacketType.TEXT),
+    int(PacketType.MSG): _decode_text(PacketType.MSG),
+    int(PacketType.UPDATE): lambda view: UpdatePacket.unpack_from(view)[0],
+}
+
+
+def _route_name(route: int) -> str:
+    if route < UPDATE_ROUTE:
+        return PacketType(route).name
+
+    try:
+        return f"{PacketType.UPDATE.name}/{UpdateType(route - UPDATE_ROUTE).name}"
+    except ValueError:
+        return f"{PacketType.UPDATE.name}/{route - UPDATE_ROUTE}"
+
+
+# Takes raw packet payloads (what comes out of ENet) & hands them to the handlers subscribed to
+# their packet type, or update type for update packets. The route's read straight off the bytes &
+# looked up in a table rebuilt on (un)subscribing, and a packet is only decoded if something's
+# subscribed to its route. Packets can hold views into the payload, handlers have to copy whatever
+# they keep past the payload's lifetime.
+class PacketDispatcher:
+    __slots__ = ("_handlers", "_table", "_counts")
+
+    def __init__(self) -> None:
+        # (packet type, update type or None for all of them) -> handlers
+        self._handlers: Dict[Tuple[int, Optional[int]], List[PacketHandler]] = {}
+        self._table: List[Tuple[PacketHandler, ...]] = [()] * ROUTE_COUNT
+
+        self._counts: array = array("Q", bytes(8 * ROUTE_COUNT))  # packets seen per route
+
+    def _build_table(self) -> None:
+        table: List[Tuple[PacketHandler, ...]] = [()] * ROUTE_COUNT
+
+        for (packet_type, update_type), handlers in self._handlers.items():
+            if packet_type != UPDATE_ROUTE:
+                routes = [packet_type]
+            elif update_type is None:
+                routes = range(UPDATE_ROUTE, ROUTE_COUNT)
+            else:
+                routes = [UPDATE_ROUTE + (update_type & 0xFF)]
+
+            for route in routes:
+                table[route] += tuple(handlers)
+
+        self._table = table
+
+    def subscribe(
+        self,
+        handler: PacketHandler,
+        packet_type: PacketType,
+        update_type: Optional[UpdateType] = None,
+    ) -> None:
+        # update_type only applies to update packets, None for all of them.
+        key = (int(packet_type), None if update_type is None else int(update_type))
+
+        self._handlers.setdefault(key, []).append(handler)
+        self._build_table()
+
+    def unsubscribe(
+        self,
+        handler: PacketHandler,
+        packet_type: PacketType,
+        update_type: Optional[UpdateType] = None,
+    ) -> None:
+        key = (int(packet_type), None if update_type is None else int(update_type))
+
+        self._handlers[key].remove(handler)
+
+        if not self._handlers[key]:
+            del self._handlers[key]
+
+        self._build_table()
+
+    @staticmethod
+    def route(data: Union[bytes, bytearray, memoryview]) -> int:
+        if len(data) < PACKET_TYPE.size:
+            return UNKNOWN_ROUTE
+
+        packet_type = PACKET_TYPE.unpack_from(data)[0]
+
+        if packet_type == UPDATE_ROUTE:
+            # Truncated ones (header or extra data cut short) can't be decoded, they go to
+            # UNKNOWN's instead.
+            size = UPDATE_PACKET_HEADER.size
+
+            if len(data) >= size and UPDATE_FLAGS.unpack_from(data)[0] & UPDATE_PACKET_EXTRA_DATA:
+                size = UPDATE_DATA_LENGTH.size
+
+                if len(data) >= size:
+                    size += UPDATE_DATA_LENGTH.unpack_from(data)[0]
+
+            if len(data) < size:
+                return UNKNOWN_ROUTE
+
+            return UPDATE_ROUTE + data[PACKET_TYPE.size]
+
+        return packet_type if 0 <= packet_type < UPDATE_ROUTE else UNKNOWN_ROUTE
+
+    async def dispatch(self, data: Union[bytes, bytearray, memoryview]) -> bool:
+        # Whether there was anything subscribed to the packet.
+        route = self.route(data)
+
+        if handlers := self._table[route]:
+            try:
+                packet = PACKET_DECODERS[UPDATE_ROUTE if route >= UPDATE_ROUTE else route](
+                    memoryview(data)
+                )
+            except UnicodeDecodeError:
+                # Text that isn't valid utf-8 goes to UNKNOWN's, like truncated update packets (see
+                # route). Only found out when decoding it, so unhandled ones still count as text.
+                route, handlers = UNKNOWN_ROUTE, self._table[UNKNOWN_ROUTE]
+                packet = Packet(PacketType.UNKNOWN)
+
+        self._counts[route] += 1
+
+        if not handlers:
+            return False
+
+        for handler in handlers:
+            if isawaitable(result := handler(packet)):
+                await result
+
+        return True
+
+    def counters(self) -> Dict[str, int]:
+        # Packets seen per route (whether anything handled them or not), routes seen so far only.
+        return {_route_name(route): count for route, count in enumerate(self._counts) if count}
+
+    def reset_counters(self) -> None:
+        self._counts = array("Q", bytes(8 * ROUTE_COUNT))
@@ -9,8 +9,18 @@ __all__ = (
 from dataclasses import (
     dataclass,
 )
-
-from typing import Optional
+from operator import (
+    attrgetter,
+)
+from struct import Struct
+from typing import (
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from packer import (
     Float,
@@ -23,10 +33,47 @@ from packer import (
 
 from growtopia._types import (
     AllStr,
-    LengthPrefixedData
+    LengthPrefixedData,
+)
+from growtopia.utils import (
+    Buffer,
 )
 
-from .enums import PacketType, UpdateFlags, UpdateType
+from .enums import (
+    PacketType,
+    UpdateFlags,
+    UpdateType,
+)
+from .text import (
+    TextMapping,
+    write_text_mapping,
+)
+
+# UpdatePacket's fixed part, packed in one go instead of field by field through packer. The extra
+# data follows it, prefixed with its length.
+UPDATE_PACKET_HEADER = Struct("<i4b3ifi5f2i")
+UPDATE_PACKET_DATA_LENGTH = Struct("<I")
+UPDATE_PACKET_HEADER_WITH_LENGTH = Struct(UPDATE_PACKET_HEADER.format + "I")
+UPDATE_PACKET_FIELDS = attrgetter(
+    "type",
+    "update_type",
+    "object_type",
+    "count1",
+    "count2",
+    "net_id",
+    "target_net_id",
+    "flags",
+    "float_",
+    "int_",
+    "vec_x",
+    "vec_y",
+    "velo_x",
+    "velo_y",
+    "particle_rotation",
+    "int_x",
+    "int_y",
+)
+UPDATE_PACKET_EXTRA_DATA = int(UpdateFlags.EXTRA_DATA)
 
 
 @packable
@@ -41,27 +88,53 @@ class StrPacket:
     type: Pack[Int32] = PacketType.MSG
     text: OptionalPack[AllStr] = None
 
+    # Parsed lazily, for the text it was parsed from (not fields, nothing to pack).
+    _mapping = None
+    _mapping_text = None
+
     def __post_init__(self) -> None:
         self.type: PacketType
         self.text: Optional[str]
 
     @classmethod
-    def from_mapping(cls, mapping: dict[str, str]) -> "StrPacket":
-        return StrPacket(cls.type, "\n".join([f"{k}|{v}\n" for k, v in mapping.items()]))
-    
-    def get_mapping(self) -> dict[str, str]:
+    def from_mapping(cls, mapping: Mapping[str, object]) -> "StrPacket":
+        buffer = Buffer()
+        write_text_mapping(buffer, mapping)
+
+        return cls(cls.type, str(buffer.view, "utf-8"))
+
+    @classmethod
+    def write_mapping(cls, buffer: Buffer, mapping: Mapping[str, object]) -> None:
+        # What from_mapping(mapping).pack() gives, written straight into buffer.
+        buffer.write_int(cls.type, 4)
+        write_text_mapping(buffer, mapping)
+
+    @staticmethod
+    def read_mapping(data: Union[bytes, bytearray, memoryview]) -> TextMapping:
+        # The mapping of a packed text/message packet, read in place (no packet or str made).
+        return TextMapping(memoryview(data)[4:])
+
+    def get_mapping(self) -> Mapping[str, str]:
         if not self.text:
             return {}
 
-        lines = self.text.split("\n")
-        return {key: value for key, value in (line.split("|") for line in lines if "|" in line)}
+        if self._mapping is None or self._mapping_text is not self.text:
+            self._mapping = TextMapping(self.text.encode())
+            self._mapping_text = self.text
+
+        return self._mapping
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        # A single value, e.g. get("action"), without parsing the rest of the text.
+        return self.get_mapping().get(key, default)
+
 
 class TextPacket(StrPacket):
     type: Pack[Int32] = PacketType.TEXT
     text: OptionalPack[AllStr] = None
 
     @classmethod
-    def from_mapping(cls, mapping: dict[str, str]) -> "TextPacket":
+    def from_mapping(cls, mapping: Mapping[str, object]) -> "TextPacket":
         return super().from_mapping(mapping)
 
 
@@ -70,7 +143,7 @@ class MessagePacket(StrPacket):
     text: OptionalPack[AllStr] = None
 
     @classmethod
-    def from_mapping(cls, mapping: dict[str, str]) -> "TextPacket":
+    def from_mapping(cls, mapping: Mapping[str, object]) -> "MessagePacket":
         return super().from_mapping(mapping)
 
 @packable
@@ -133,4 +206,72 @@ class UpdatePacket:
         self.int_x: int
         self.int_y: int
         
-        self.extra_data: bytearray
+        self.extra_data: Optional[Union[bytearray, memoryview]]
+
+    @staticmethod
+    def unpack_from(
+        data: Union[bytes, bytearray, memoryview], offset: int = 0
+    ) -> Tuple["UpdatePacket", int]:
+        # The packet at offset & its size. extra_data is a view into data rather than a copy, and
+        # is only read if the EXTRA_DATA flag is set (otherwise packets can't follow each other).
+        packet = UpdatePacket(*UPDATE_PACKET_HEADER.unpack_from(data, offset))
+        size = UPDATE_PACKET_HEADER.size
+
+        if packet.flags & UPDATE_PACKET_EXTRA_DATA:
+            length = UPDATE_PACKET_DATA_LENGTH.unpack_from(data, offset + size)[0]
+            size += UPDATE_PACKET_DATA_LENGTH.size
+
+            if offset + size + length > len(data):
+                raise ValueError(f"Extra data runs past the end ({length} bytes)")
+
+            packet.extra_data = memoryview(data)[offset + size : offset + size + length]
+            size += length
+
+        return packet, size
+
+    @staticmethod
+    def unpack_many(data: Union[bytes, bytearray, memoryview]) -> Iterator["UpdatePacket"]:
+        offset = 0
+
+        while offset < len(data):
+            packet, size = UpdatePacket.unpack_from(data, offset)
+            offset += size
+
+            yield packet
+
+    @staticmethod
+    def pack_many(packets: Iterable["UpdatePacket"], buffer: Optional[Buffer] = None) -> Buffer:
+        # Back to back into one buffer, copied in all at once. An empty buffer (e.g. a pooled one)
+        # is falsy, so it's checked against None.
+        if buffer is None:
+            buffer = Buffer()
+
+        buffer.write_many([packet.to_bytes() for packet in packets])
+
+        return buffer
+
+    @property
+    def packed_size(self) -> int:
+        if self.extra_data is None:
+            return UPDATE_PACKET_HEADER.size
+
+        return UPDATE_PACKET_HEADER.size + UPDATE_PACKET_DATA_LENGTH.size + len(self.extra_data)
+
+    def pack_into(self, buffer: Buffer) -> None:
+        if self.extra_data is None:
+            buffer.write_struct(UPDATE_PACKET_HEADER, *UPDATE_PACKET_FIELDS(self))
+        else:
+            buffer.write_struct(
+                UPDATE_PACKET_HEADER_WITH_LENGTH, *UPDATE_PACKET_FIELDS(self), len(self.extra_data)
+            )
+            buffer.write(self.extra_data)
+
+    def to_bytes(self) -> bytes:
+        # What pack gives.
+        if self.extra_data is None:
+            return UPDATE_PACKET_HEADER.pack(*UPDATE_PACKET_FIELDS(self))
+
+        return (
+            UPDATE_PACKET_HEADER_WITH_LENGTH.pack(*UPDATE_PACKET_FIELDS(self), len(self.extra_data))
+            + self.extra_data
+        )
@@ -0,0 +1,90 @@
+__all__ = (
+    "TextMapping",
+    "write_text_mapping",
+)
+
+import re
+from functools import (
+    lru_cache,
+)
+from typing import (
+    Dict,
+    Iterator,
+    Mapping,
+    Optional,
+    Pattern,
+    Union,
+)
+
+from growtopia.utils import (
+    Buffer,
+)
+
+
+# The key|value line for key. Anything after the first | is the value (dialog lines have more).
+@lru_cache(maxsize=256)
+def _key_pattern(key: str) -> Pattern[bytes]:
+    return re.compile(rb"^" + re.escape(key.encode()) + rb"\|([^\n]*)", re.MULTILINE)
+
+
+# Read-only key|value mapping over the raw text of a text/message packet. Nothing's decoded up
+# front: looking up a single key (e.g. "action") searches the text for just that line, the rest
+# of the lines are only split up & decoded once the mapping's iterated over. The first line for
+# a key wins, like the game's own parser.
+class TextMapping(Mapping[str, str]):
+    __slots__ = ("_data", "_parsed", "_found")
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        self._data: Union[bytes, bytearray, memoryview] = data
+
+        self._parsed: Optional[Dict[str, str]] = None  # every line, in order
+        self._found: Dict[str, Optional[str]] = {}  # single lookups made before that
+
+    def _parse(self) -> Dict[str, str]:
+        if self._parsed is None:
+            self._parsed = {}
+
+            for line in str(self._data, "utf-8").split("\n"):
+                key, sep, value = line.partition("|")
+
+                if sep and key not in self._parsed:
+                    self._parsed[key] = value
+
+            self._found.clear()
+
+        return self._parsed
+
+    def __getitem__(self, key: str) -> str:
+        if self._parsed is not None:
+            return self._parsed[key]
+
+        if key not in self._found:
+            match = _key_pattern(key).search(self._data)
+            self._found[key] = match[1].decode() if match is not None else None
+
+        if (value := self._found[key]) is None:
+            raise KeyError(key)
+
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._parse())
+
+    def __len__(self) -> int:
+        return len(self._parse())
+
+    def __repr__(self) -> str:
+        return f"TextMapping({self._parse()!r})"
+
+
+def write_text_mapping(buffer: Buffer, mapping: Mapping[str, object]) -> None:
+    # The text a mapping's turned into (key|value\n per item), encoded straight into buffer.
+    parts = []
+
+    for key, value in mapping.items():
+        parts += (key.encode(), b"|", str(value).encode(), b"\n")
+
+    buffer.write_many(parts)
@@ -0,0 +1,257 @@
+__all__ = (
+    "VariantList",
+    "VariantCall",
+    "write_variants",
+    "ON_CONSOLE_MESSAGE",
+    "ON_DIALOG_REQUEST",
+    "ON_TEXT_OVERLAY",
+    "ON_TALK_BUBBLE",
+    "ON_SET_POS",
+)
+
+from struct import Struct
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from growtopia.utils import (
+    Buffer,
+)
+
+from .enums import (
+    UpdateFlags,
+    UpdateType,
+    VariantType,
+)
+from .packet import (
+    UpdatePacket,
+)
+
+# A variant list is a count byte followed by that many variants: an index byte, a type byte & the
+# value (strings are prefixed with their u32 length).
+VARIANT_HEADER = Struct("<BB")
+VARIANT_STR_HEADER = Struct("<BBI")
+
+# Keyed by the plain ints, enum members are a lot slower to hash & compare.
+VARIANT_STRUCTS: Dict[int, Struct] = {
+    int(VariantType.FLOAT): Struct("<f"),
+    int(VariantType.VECTOR2): Struct("<2f"),
+    int(VariantType.VECTOR3): Struct("<3f"),
+    int(VariantType.UINT): Struct("<I"),
+    int(VariantType.INT): Struct("<i"),
+}
+
+VARIANT_STR = int(VariantType.STR)
+VARIANT_VECTORS = (int(VariantType.VECTOR2), int(VariantType.VECTOR3))
+
+# Header & value in one go, for encoding.
+VARIANT_VALUE_STRUCTS: Dict[int, Struct] = {
+    variant_type: Struct("<BB" + value_struct.format[1:])
+    for variant_type, value_struct in VARIANT_STRUCTS.items()
+}
+
+Variant = Union[str, int, float, Tuple[float, float], Tuple[float, float, float]]
+
+
+def _variant_type(value: Variant) -> int:
+    if isinstance(value, str):
+        return VARIANT_STR
+    elif isinstance(value, int):
+        return int(VariantType.INT)
+    elif isinstance(value, float):
+        return int(VariantType.FLOAT)
+    elif isinstance(value, tuple) and len(value) in (2, 3):
+        return VARIANT_VECTORS[len(value) - 2]
+
+    raise TypeError(f"Can't tell the variant type of {value!r}")
+
+
+def _encode_variant(index: int, variant_type: int, value: Variant) -> bytes:
+    if variant_type == VARIANT_STR:
+        data = value.encode()
+        return VARIANT_STR_HEADER.pack(index, variant_type, len(data)) + data
+
+    if variant_type in VARIANT_VECTORS:
+        return VARIANT_VALUE_STRUCTS[variant_type].pack(index, variant_type, *value)
+
+    return VARIANT_VALUE_STRUCTS[variant_type].pack(index, variant_type, value)
+
+
+def write_variants(buffer: Buffer, variants: Sequence[Variant]) -> None:
+    # Types are inferred: str, int (INT), float & tuples of 2/3 floats (VECTOR2/3). Anything else
+    # (UINT) needs a VariantCall.
+    buffer.write_many(
+        [
+            bytes((len(variants),)),
+            *(_encode_variant(i, _variant_type(value), value) for i, value in enumerate(variants)),
+        ]
+    )
+
+
+# The arguments of a CALL_FUNCTION update packet, decoded one at a time as they're accessed,
+# straight from the packet data. Headers are only walked as far as needed to find a variant.
+class VariantList(Sequence[Variant]):
+    __slots__ = ("_data", "_count", "_offset", "_variants", "_values")
+
+    @staticmethod
+    def from_packet(packet: UpdatePacket) -> "VariantList":
+        return VariantList(memoryview(packet.extra_data or b""))
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        self._data: Union[bytes, bytearray, memoryview] = data
+        self._count: int = data[0] if len(data) else 0
+
+        self._offset: int = 1  # of the next header to walk
+        self._variants: List[Tuple[int, int, int]] = []  # (index, type, value offset) walked
+        self._values: Dict[int, Variant] = {}
+
+    def _walk(self) -> None:
+        data = self._data
+        offset = self._offset
+
+        index, variant_type = VARIANT_HEADER.unpack_from(data, offset)
+        offset += VARIANT_HEADER.size
+
+        if variant_type == VARIANT_STR:
+            size = VARIANT_STR_HEADER.size - VARIANT_HEADER.size
+            size += VARIANT_STR_HEADER.unpack_from(data, self._offset)[2]
+        elif variant_type in VARIANT_STRUCTS:
+            size = VARIANT_STRUCTS[variant_type].size
+        else:
+            raise ValueError(f"Unknown variant type: {variant_type}")
+
+        if index >= self._count or offset + size > len(data):
+            raise ValueError(f"Malformed variant list (variant {index} of {self._count})")
+
+        self._variants.append((index, variant_type, offset))
+        self._offset = offset + size
+
+    def _find(self, index: int) -> Tuple[int, int]:
+        # Variants are in order of their index, but that's not relied on.
+        for variant_index, variant_type, offset in self._variants:
+            if variant_index == index:
+                return variant_type, offset
+
+        while len(self._variants) < self._count:
+            self._walk()
+
+            if self._variants[-1][0] == index:
+                return self._variants[-1][1:]
+
+        raise ValueError(f"Variant {index} is missing")
+
+    def _decode(self, index: int) -> Variant:
+        variant_type, offset = self._find(index)
+
+        if variant_type == VARIANT_STR:
+            size = VARIANT_STR_HEADER.unpack_from(self._data, offset - VARIANT_HEADER.size)[2]
+            offset += VARIANT_STR_HEADER.size - VARIANT_HEADER.size
+
+            return str(self._data[offset : offset + size], "utf-8")
+
+        value = VARIANT_STRUCTS[variant_type].unpack_from(self._data, offset)
+
+        return value if variant_type in VARIANT_VECTORS else value[0]
+
+    def __getitem__(self, index: int) -> Variant:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("variant index out of range")
+
+        if index not in self._values:
+            self._values[index] = self._decode(index)
+
+        return self._values[index]
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def function(self) -> Optional[str]:
+        return self[0] if len(self) else None
+
+    def type_of(self, index: int) -> VariantType:
+        return VariantType(self._find(index)[0])
+
+    def __repr__(self) -> str:
+        return f"VariantList({list(self)!r})"
+
+
+# A function call with a fixed signature, compiled once. Arguments given as a VariantType are
+# filled in on each call, anything else is a constant that's encoded up front (the function name
+# always is). Constant variants next to each other are kept as a single piece of bytes.
+class VariantCall:
+    __slots__ = ("function", "arguments", "_parts", "_count")
+
+    def __init__(self, function: str, *arguments: Union[VariantType, Variant]) -> None:
+        self.function: str = function
+        self.arguments: Tuple[Union[VariantType, Variant], ...] = arguments
+
+        # bytes for the constant runs, (index, type) for the arguments.
+        self._parts: List[Union[bytes, Tuple[int, int]]] = []
+        constant = bytearray((len(arguments) + 1,)) + _encode_variant(0, VARIANT_STR, function)
+
+        for index, argument in enumerate(arguments, 1):
+            if isinstance(argument, VariantType):
+                if constant:
+                    self._parts.append(bytes(constant))
+                    constant.clear()
+
+                self._parts.append((index, int(argument)))
+            else:
+                constant += _encode_variant(index, _variant_type(argument), argument)
+
+        if constant:
+            self._parts.append(bytes(constant))
+
+        self._count: int = sum(isinstance(argument, VariantType) for argument in arguments)
+
+    def _encode(self, values: Tuple[Variant, ...]) -> List[bytes]:
+        parts = []
+        values = iter(values)
+
+        for part in self._parts:
+            if isinstance(part, bytes):
+                parts.append(part)
+            else:
+                parts.append(_encode_variant(*part, next(values)))
+
+        return parts
+
+    def _check(self, values: Tuple[Variant, ...]) -> None:
+        if len(values) != self._count:
+            raise TypeError(f"{self.function} takes {self._count} arguments ({len(values)} given)")
+
+    def encode(self, *values: Variant) -> bytes:
+        self._check(values)
+        return b"".join(self._encode(values))
+
+    def write(self, buffer: Buffer, *values: Variant) -> None:
+        self._check(values)
+        buffer.write_many(self._encode(values))
+
+    def to_packet(self, *values: Variant, net_id: int = -1, delay: int = 0) -> UpdatePacket:
+        return UpdatePacket(
+            update_type=UpdateType.CALL_FUNCTION,
+            net_id=net_id,
+            flags=UpdateFlags.EXTRA_DATA,
+            int_=delay,
+            extra_data=self.encode(*values),
+        )
+
+
+ON_CONSOLE_MESSAGE = VariantCall("OnConsoleMessage", VariantType.STR)
+ON_DIALOG_REQUEST = VariantCall("OnDialogRequest", VariantType.STR)
+ON_TEXT_OVERLAY = VariantCall("OnTextOverlay", VariantType.STR)
+ON_TALK_BUBBLE = VariantCall("OnTalkBubble", VariantType.INT, VariantType.STR)
+ON_SET_POS = VariantCall("OnSetPos", VariantType.VECTOR2)
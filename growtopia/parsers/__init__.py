@@ -1,7 +1,15 @@
 from .enums import *
 from .item import *
+from .item_blob import *
+from .item_record import *
 from .items_data import *
+from .items_data_patch import *
+from .items_data_reloader import *
+from .items_table import *
 from .pet_info import *
+from .player_tribute_data import *
 from .punch_options import *
 from .seed_info import *
 from .sit_info import *
+from .tile_updates import *
+from .world import *
@@ -6,6 +6,8 @@ __all__ = (
     "ItemCollisionType",
     "ItemStorageType",
     "ItemMaterialType",
+    "TileFlags",
+    "TileExtraType",
 )
 
 from typing import TypeVar
@@ -248,3 +250,33 @@ class ItemStorageType(IntEnumBase):
 
 
 class ItemMaterialType(IntEnumBase): ...
+
+
+class TileFlags(IntFlag):
+    EXTRA_DATA = 1 << 0
+    LOCKED = 1 << 1  # a lock index follows the tile's fixed part
+    SPLICED = 1 << 2
+    WILL_SPAWN_SEEDS = 1 << 3
+    SEEDLING = 1 << 4
+    FLIPPED = 1 << 5
+    OPEN = 1 << 6
+    PUBLIC = 1 << 7
+    SILENCED = 1 << 9
+    WATER = 1 << 10
+    FIRE = 1 << 12
+    RED = 1 << 13
+    GREEN = 1 << 14
+    BLUE = 1 << 15
+
+
+class TileExtraType(IntEnumBase):
+    DOOR = 1
+    SIGN = 2
+    LOCK = 3
+    SEED = 4
+    MAILBOX = 6
+    BULLETIN = 7
+    DICE = 8
+    PROVIDER = 9
+    ACHIEVEMENT = 10
+    HEART_MONITOR = 11
@@ -1,25 +1,42 @@
-__all__ = ("Item",)
+__all__ = ("Item", "ItemCodec")
 
+import os
 from dataclasses import (
     dataclass,
     field,
+    fields,
 )
+from struct import Struct
+from sys import intern
 from typing import (
+    Any,
     Callable,
     Dict,
+    List,
     Optional,
+    Tuple,
     Type,
     TypeVar,
+    Union,
 )
+from weakref import ref
 
 from growtopia.net import HTTP
 from growtopia.utils import (
     Buffer,
+    hash_file,
     xor_cipher,
 )
 
 from .constants import *
 from .enums import *
+from .item_blob import (
+    ItemBlobField,
+    _intern_blob,
+)
+from .item_record import (
+    ItemRecord,
+)
 from .pet_info import *
 from .punch_options import *
 from .seed_info import *
@@ -27,6 +44,10 @@ from .sit_info import *
 
 T = TypeVar("T")
 
+# Decoded as shared bytes (see ITEM_BLOBS), each item gets its own copy once it's accessed.
+ITEM_BLOB_ATTRS: Tuple[str, ...] = ("overlay_object", "reserved", "bodypart")
+
+
 # COPE + MALD + SEETHE
 # Actually.. we could prolly use utils.packer for this.. but like I'm too lazy.
 
@@ -38,12 +59,12 @@ ITEM_DESERIALISERS: Dict[Type[T], Callable[[str, Buffer], T]] = {
     int: lambda attr, buffer: buffer.read_int(ITEM_ATTR_SIZES[attr]),
     bool: lambda attr, buffer: bool(buffer.read_int(ITEM_ATTR_SIZES[attr])),
     str: lambda _, buffer: buffer.read_str(buffer.read_int(2)),
-    bytearray: lambda attr, buffer: bytearray(buffer.read(ITEM_ATTR_SIZES[attr])),
+    bytearray: lambda attr, buffer: _intern_blob(buffer.read(ITEM_ATTR_SIZES[attr])),
     tuple: lambda _, buffer: (buffer.read_int(1), buffer.read_int(1)),
     ItemPetInfo: lambda _, buffer: ItemPetInfo.from_bytes(buffer),
     ItemSeedInfo: lambda _, buffer: ItemSeedInfo.from_bytes(buffer),
     ItemPunchOptions: lambda _, buffer: ItemPunchOptions.from_str(
-        buffer.read_str(buffer.read_int(2))
+        intern(buffer.read_str(buffer.read_int(2)))
     ),
     ItemSitInfo: lambda _, buffer: ItemSitInfo.from_bytes(buffer),
 }
@@ -70,15 +91,296 @@ ITEM_SERIALISERS: Dict[Type[T], Callable[[str, T, Buffer], None]] = {
     ItemSitInfo: lambda _, value, buffer: value.to_bytes(buffer),
 }
 
+ITEM_STR_LEN: Struct = Struct("<H")
+
+# Records that were just decoded have no owner yet, (a weak reference to) the item's set as theirs
+# without the checks of ItemRecord._add_owner.
+ITEM_RECORD_SET_OWNER: Callable[[ItemRecord, Any], None] = ItemRecord._owner.__set__
+
+ITEM_INT_FORMATS: Dict[int, str] = {
+    1: "B",
+    2: "H",
+    4: "I",
+    8: "Q",
+}
+
+# Types whose encoded size doesn't depend on the value, along with how to (un)flatten them
+# from/to the values of a struct run: (format, build from values, flatten into values).
+ITEM_FIXED_LAYOUTS: Dict[Type[T], Tuple[str, Callable[..., T], Callable[[T], tuple]]] = {
+    tuple: ("BB", lambda *values: values, lambda value: value),
+    ItemSeedInfo: (
+        "BBBBII",
+        ItemSeedInfo._from_values,
+        lambda value: (
+            value.base_index,
+            value.overlay_index,
+            value.tree_base_index,
+            value.tree_leaves_index,
+            value.colour,
+            value.overlay_colour,
+        ),
+    ),
+}
+
+# Encoded layout of the variable-length types: fixed-size chunks (in bytes) and
+# length-prefixed strings (None), in order. Used to skip over items without decoding them.
+ITEM_VARIABLE_LAYOUTS: Dict[Type, Tuple[Optional[int], ...]] = {
+    str: (None,),
+    ItemPetInfo: (None, None, None, None),
+    ItemPunchOptions: (None,),
+    ItemSitInfo: (25, None),
+}
+
+
+# Compiled once per items.dat version from the field order & ITEM_ATTR_SIZES. Runs of fixed-size
+# attrs are merged into a single Struct, only variable-length ones (strings & the records holding
+# them) are handled separately.
+class ItemCodec:
+    __slots__ = (
+        "version",
+        "item_cls",
+        "steps",
+        "layout",
+        "defaults",
+        "setters",
+        "records",
+        "blobs",
+        "min_size",
+    )
+
+    def __init__(self, item_cls: Type["Item"], version: int) -> None:
+        self.version: int = version
+        self.item_cls: Type["Item"] = item_cls
+        # (Struct, ((attr, start, stop, build, flatten), ...)) for fixed runs,
+        # (None, (attr, type, intern)) for variable-length attributes.
+        self.steps: List[Tuple[Optional[Struct], Any]] = []
+        # Fixed-size chunks & strings making up an encoded item, see ITEM_VARIABLE_LAYOUTS.
+        self.layout: List[Optional[int]] = []
+        # Values of the attrs that aren't part of this version's layout.
+        self.defaults: Dict[str, Any] = {}
+        # Slot setters of every attr, in the order decode fills them in (defaults first).
+        self.setters: List[Callable[[Any, Any], None]] = []
+        # Attrs holding an ItemRecord, decoded items are added as their records' owner.
+        self.records: List[str] = []
+        # Attr -> how to read it as it's stored, for the blob attrs (see ItemBlobField).
+        self.blobs: Dict[str, Callable[[Any], Union[bytes, bytearray]]] = {}
+        # Size of an encoded item with all of its strings empty.
+        self.min_size: int = 0
+
+        defaults = item_cls()
+        ignored = set(ITEM_IGNORED_ATTRS[version])
+
+        fmt, run = "<", []
+
+        for item_field in fields(item_cls):
+            attr = item_field.name
+
+            if isinstance(item_slot := getattr(item_cls, attr), ItemBlobField):
+                self.blobs[attr] = item_slot.raw
+                value = item_slot.raw(defaults)
+            else:
+                value = getattr(defaults, attr)
+
+            if attr in ignored or not item_field.init:
+                self.defaults[attr] = _intern_blob(value) if attr in self.blobs else value
+                continue
+
+            attr_type = type(value)
+            build, flatten = None, None
+
+            if issubclass(attr_type, ItemRecord):
+                self.records.append(attr)
+
+            if attr_type in ITEM_FIXED_LAYOUTS:
+                attr_fmt, build, flatten = ITEM_FIXED_LAYOUTS[attr_type]
+            elif attr_type is bytearray:
+                attr_fmt, build = f"{ITEM_ATTR_SIZES[attr]}s", _intern_blob
+            elif attr_type in ITEM_ENUM_TYPES or attr_type in (int, bool):
+                attr_fmt = ITEM_INT_FORMATS[ITEM_ATTR_SIZES[attr]]
+                build = None if attr_type is int else attr_type
+            else:
+                if run:
+                    self.steps.append((Struct(fmt), tuple(run)))
+                    fmt, run = "<", []
+
+                # Paths & options repeat across thousands of items, names are all different.
+                self.steps.append((None, (attr, attr_type, str if attr == "name" else intern)))
+                continue
+
+            if attr == "break_hits":
+                build, flatten = lambda value: value // 6, lambda value: (value * 6,)
+
+            attr_struct = Struct("<" + attr_fmt)
+            start = run[-1][2] if run else 0
+            stop = start + len(attr_struct.unpack(bytes(attr_struct.size)))
+
+            fmt += attr_fmt
+            run.append((attr, start, stop, build, flatten))
+
+        if run:
+            self.steps.append((Struct(fmt), tuple(run)))
+
+        attrs = list(self.defaults)
+
+        for run_struct, run in self.steps:
+            if run_struct is not None:
+                attrs.extend(attr for attr, *_ in run)
+            else:
+                attrs.append(run[0])
+
+        for attr in attrs:
+            item_slot = getattr(item_cls, attr)
+
+            # Blobs are set straight into their slot, as the shared bytes they're decoded as.
+            if isinstance(item_slot, ItemBlobField):
+                item_slot = item_slot.slot
+
+            self.setters.append(item_slot.__set__)
+
+        for run_struct, run in self.steps:
+            for size in (run_struct.size,) if run_struct else ITEM_VARIABLE_LAYOUTS[run[1]]:
+                if size is not None and self.layout and self.layout[-1] is not None:
+                    self.layout[-1] += size
+                else:
+                    self.layout.append(size)
+
+        self.min_size = sum(2 if size is None else size for size in self.layout)
+
+    def size_hint(self, item: "Item") -> int:
+        # Close to (never more than) the encoded size, only the top-level strings are counted.
+        size = self.min_size
+
+        for run_struct, run in self.steps:
+            if run_struct is None and run[1] is str:
+                size += len(getattr(item, run[0]))
+
+        return size
+
+    def decode(self, buffer: Buffer, *, decipher_name: bool = True, view: bool = False) -> "Item":
+        # With view, the item's encoding is kept as a view into the buffer's data instead of a copy
+        # (the data can't be resized while it's around). Only for data that's never changed, like
+        # ItemsData's own copy of a loaded items.dat.
+        data = buffer.data
+        start = buffer.offset
+        kwargs = self.defaults.copy()
+
+        for run_struct, run in self.steps:
+            if run_struct is not None:
+                values = run_struct.unpack_from(data, buffer.offset)
+                buffer.skip(run_struct.size)
+
+                for attr, first, last, build, _ in run:
+                    if build is None:
+                        kwargs[attr] = values[first]
+                    elif last - first == 1:
+                        kwargs[attr] = build(values[first])
+                    else:
+                        kwargs[attr] = build(*values[first:last])
+            elif run[1] is str:
+                offset = buffer.offset + 2
+                size = ITEM_STR_LEN.unpack_from(data, buffer.offset)[0]
+
+                kwargs[run[0]] = run[2](data[offset : offset + size].decode())
+                buffer.skip(size + 2)
+            else:
+                kwargs[run[0]] = ITEM_DESERIALISERS[run[1]](run[0], buffer)
+
+        # Left to the caller when decoding a whole items data, see xor_cipher_many.
+        if decipher_name:
+            kwargs["name"] = xor_cipher(kwargs["name"], kwargs["id"])
+
+        if self.version == LATEST_ITEMS_DATA_VERSION:
+            end = buffer.offset
+            kwargs["_encoded"] = buffer.view[start:end] if view else bytes(data[start:end])
+
+        # Skips __init__ & __setattr__, as if the values were all set in one go. kwargs is always
+        # filled in the same order, the one setters are in.
+        item = self.item_cls.__new__(self.item_cls)
+
+        for setter, value in zip(self.setters, kwargs.values()):
+            setter(item, value)
+
+        owner = ref(item)
 
-@dataclass
+        for attr in self.records:
+            ITEM_RECORD_SET_OWNER(kwargs[attr], owner)
+
+        return item
+
+    def skip(self, buffer: Buffer) -> None:
+        data = buffer.data
+        offset = buffer.offset
+
+        for size in self.layout:
+            if size is None:
+                offset += ITEM_STR_LEN.unpack_from(data, offset)[0] + 2
+            else:
+                offset += size
+
+        buffer.skip(offset - buffer.offset)
+
+    def find_end(self, data: Union[bytearray, bytes], offset: int) -> Optional[int]:
+        # skip for data that may not be all there yet, the offset right after the item starting at
+        # offset or None if the data ends before it does.
+        size = len(data)
+
+        for item_size in self.layout:
+            if item_size is not None:
+                offset += item_size
+            elif offset + 2 > size:
+                return None
+            else:
+                offset += ITEM_STR_LEN.unpack_from(data, offset)[0] + 2
+
+        return offset if offset <= size else None
+
+    def encode(self, item: "Item", buffer: Buffer) -> None:
+        blobs = self.blobs
+        parts = []
+
+        for run_struct, run in self.steps:
+            if run_struct is not None:
+                values = []
+
+                for attr, _, _, _, flatten in run:
+                    if attr in blobs:  # read without making the item's own copy
+                        values.append(blobs[attr](item))
+                    elif flatten is None:
+                        values.append(getattr(item, attr))
+                    else:
+                        values.extend(flatten(getattr(item, attr)))
+
+                parts.append(run_struct.pack(*values))
+                continue
+
+            attr = run[0]
+            value = getattr(item, attr) if attr != "name" else xor_cipher(item.name, item.id)
+
+            if type(value) is str:
+                parts.append(ITEM_STR_LEN.pack(len(encoded := value.encode())))
+                parts.append(encoded)
+                continue
+
+            if parts:
+                buffer.write(b"".join(parts))
+                parts.clear()
+
+            ITEM_SERIALISERS[type(value)](attr, value, buffer)
+
+        buffer.write(b"".join(parts))
+
+
+ITEM_CODECS: Dict[int, ItemCodec] = {}
+
+
+@dataclass(slots=True)
 class ItemTextureInfo:
     path: str = ""
     hash: int = 0
     pos: tuple[int, int] = (0, 0)
 
 
-@dataclass
+@dataclass(slots=True, weakref_slot=True)
 class Item:
     id: int = 0
 
@@ -151,36 +453,58 @@ class Item:
     unknown_int: int = 0  # idk, too lazy to find out asw.
     renderer_file_hash: int = 0
 
-    @staticmethod
-    def from_bytes(data: Buffer, version) -> "Item":
-        item = Item()
+    # The item as encoded for LATEST_ITEMS_DATA_VERSION, either how it was read (a view into the
+    # items data it was read from) or how it was last written. Dropped whenever an attribute is
+    # set or one of the item's records is changed (see ItemRecord).
+    _encoded: Optional[Union[bytes, memoryview]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
-        for attr in item.__dict__:
-            if attr in ITEM_IGNORED_ATTRS[version]:
-                continue
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
 
-            setattr(item, attr, ITEM_DESERIALISERS[type(getattr(item, attr))](attr, data))
+        if name != "_encoded":
+            object.__setattr__(self, "_encoded", None)
 
-            if attr == "name":
-                item.name = xor_cipher(item.name, item.id)
-            elif attr == "break_hits":
-                item.break_hits = item.break_hits // 6
+            if isinstance(value, ItemRecord):
+                value._add_owner(self)
 
-        return item
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # Views can't be pickled. _encoded is the last field, so it's set last on unpickling & stays.
+        state = {item_field.name: getattr(self, item_field.name) for item_field in fields(self)}
 
-    def to_bytes(self, buffer: Buffer, version: int) -> None:
-        for attr in self.__dict__:
-            if attr in ITEM_IGNORED_ATTRS[version]:
-                continue
+        if isinstance(state["_encoded"], memoryview):
+            state["_encoded"] = bytes(state["_encoded"])
 
-            attr_val = getattr(self, attr)
+        return None, state
 
-            if attr == "name":
-                attr_val = xor_cipher(attr_val, self.id)
-            elif attr == "break_hits":
-                attr_val *= 6
+    @staticmethod
+    def get_codec(version: int) -> ItemCodec:
+        if (codec := ITEM_CODECS.get(version)) is None:
+            codec = ITEM_CODECS[version] = ItemCodec(Item, version)
+
+        return codec
+
+    @staticmethod
+    def from_bytes(data: Buffer, version) -> "Item":
+        return Item.get_codec(version).decode(data)
 
-            ITEM_SERIALISERS[type(attr_val)](attr, attr_val, buffer)
+    def to_bytes(self, buffer: Buffer, version: int) -> None:
+        if version != LATEST_ITEMS_DATA_VERSION:
+            Item.get_codec(version).encode(self, buffer)
+        elif self._encoded is not None:
+            buffer.write(self._encoded)
+        else:
+            start = len(buffer)
+            Item.get_codec(version).encode(self, buffer)
+            self._encoded = bytes(buffer.data[start:])
+
+    def mark_dirty(self) -> None:
+        self._encoded = None
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._encoded is None
 
     def is_of_category(self, item_category: ItemCategory) -> bool:
         return self.category == item_category
@@ -206,6 +530,16 @@ class Item:
 
         return await HTTP.fetch_file_from_cdn(self.extra_file_path, **kwargs)
 
+    @staticmethod
+    async def _hash_file(path: str, local: bool, **kwargs) -> Optional[int]:
+        # Hashed chunk by chunk, whether it's read from disk or streamed from the CDN.
+        if not path:
+            return None
+        elif local:
+            return hash_file(path) if os.path.getsize(path) else None
+
+        return await HTTP.hash_file_from_cdn(path, **kwargs)
+
     async def update_texture_hash(
         self,
         file_path: str = "",
@@ -217,16 +551,12 @@ class Item:
             self.texture_hash = texture_hash
             return True
 
-        data: Buffer
-        if not file_path:
-            data = await self.fetch_texture_file(**kwargs)
-        else:
-            data = Buffer.load(file_path)
+        file_hash = await self._hash_file(file_path or self.texture_path, bool(file_path), **kwargs)
 
-        if not data:
+        if file_hash is None:
             return False
 
-        self.texture_hash = data.hash()
+        self.texture_hash = file_hash
         return True
 
     async def update_texture_hash2(
@@ -240,16 +570,14 @@ class Item:
             self.texture_hash = texture_hash
             return True
 
-        data: Buffer
-        if not file_path:
-            data = await self.fetch_texture_file2(**kwargs)
-        else:
-            data = Buffer.load(file_path)
+        file_hash = await self._hash_file(
+            file_path or self.texture_path2, bool(file_path), **kwargs
+        )
 
-        if not data:
+        if file_hash is None:
             return False
 
-        self.texture_hash = data.hash()
+        self.texture_hash = file_hash
         return True
 
     async def update_extra_file_hash(
@@ -263,16 +591,14 @@ class Item:
             self.extra_file_hash = extra_file_hash
             return True
 
-        data: Buffer
-        if not file_path:
-            data = await self.fetch_extra_file(**kwargs)
-        else:
-            data = Buffer.load(file_path)
+        file_hash = await self._hash_file(
+            file_path or self.extra_file_path, bool(file_path), **kwargs
+        )
 
-        if not data:
+        if file_hash is None:
             return False
 
-        self.extra_file_hash = data.hash()
+        self.extra_file_hash = file_hash
         return True
 
     @property
@@ -349,3 +675,8 @@ class Item:
 
     def __str__(self) -> str:
         return f"<{self.__class__.__name__}: name={self.name}, id={self.id}, category={self.category.name}, properties={self.properties.name}>"
+
+
+# Done once @dataclass(slots=True) has made the slots, see ItemBlobField.
+for attr in ITEM_BLOB_ATTRS:
+    setattr(Item, attr, ItemBlobField(getattr(Item, attr)))
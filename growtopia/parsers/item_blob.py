@@ -0,0 +1,120 @@
+__all__ = ("ItemBlob",)
+
+from typing import (
+    Any,
+    Dict,
+    Optional,
+    Union,
+)
+from weakref import ref
+
+# Shared copies of the blob attrs (reserved, overlay_object, bodypart) of decoded items, they're
+# mostly the same few values. Bounded, so that loading many different items data doesn't keep
+# every blob it's ever seen around: once it's full, new values are simply left unshared.
+ITEM_BLOBS: Dict[bytes, bytes] = {}
+ITEM_BLOBS_MAX: int = 4096
+
+
+def _intern_blob(blob: Union[bytes, bytearray]) -> bytes:
+    blob = bytes(blob)
+
+    if (shared := ITEM_BLOBS.get(blob)) is not None:
+        return shared
+
+    if len(ITEM_BLOBS) < ITEM_BLOBS_MAX:
+        ITEM_BLOBS[blob] = blob
+
+    return blob
+
+
+# An item's own copy of one of its blobs, made the first time it's accessed (see ItemBlobField).
+# Tells the item whenever it's changed in place, so it drops its cached encoding. Writes made
+# through a memoryview of it can't be seen, call mark_dirty on the item after those.
+class ItemBlob(bytearray):
+    __slots__ = ("_owner",)
+
+    def _changed(self) -> None:
+        if (item := self._owner()) is not None:
+            item.mark_dirty()
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key: Any) -> None:
+        super().__delitem__(key)
+        self._changed()
+
+    def __iadd__(self, other: Any) -> "ItemBlob":
+        super().__iadd__(other)
+        self._changed()
+        return self
+
+    def __imul__(self, count: int) -> "ItemBlob":
+        super().__imul__(count)
+        self._changed()
+        return self
+
+    def append(self, value: int) -> None:
+        super().append(value)
+        self._changed()
+
+    def extend(self, values: Any) -> None:
+        super().extend(values)
+        self._changed()
+
+    def insert(self, index: int, value: int) -> None:
+        super().insert(index, value)
+        self._changed()
+
+    def pop(self, index: int = -1) -> int:
+        value = super().pop(index)
+        self._changed()
+        return value
+
+    def remove(self, value: int) -> None:
+        super().remove(value)
+        self._changed()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._changed()
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    def __reduce_ex__(self, protocol: Any) -> tuple:
+        # Pickled & copied as a plain bytearray, the owner's set again on first access.
+        return bytearray, (bytes(self),)
+
+
+# Wraps the slot of a blob attr of Item. Decoded items hold the shared bytes from ITEM_BLOBS, the
+# first access swaps in an ItemBlob copy of them, so editing it in place (item.reserved[0] = 1)
+# works like it does on a bytearray without touching the other items. A plain bytes/bytearray
+# that's assigned is copied the same way.
+class ItemBlobField:
+    __slots__ = ("slot",)
+
+    def __init__(self, slot: Any) -> None:
+        self.slot: Any = slot  # the member descriptor made by @dataclass(slots=True)
+
+    def __get__(self, item: Optional[Any], owner: Optional[type] = None) -> Any:
+        if item is None:
+            return self
+
+        blob = self.slot.__get__(item)
+
+        if type(blob) is not ItemBlob or blob._owner() is not item:
+            blob = ItemBlob(blob)
+            blob._owner = ref(item)
+            self.slot.__set__(item, blob)  # same value, the item's encoding stays valid
+
+        return blob
+
+    def __set__(self, item: Any, value: Union[bytes, bytearray]) -> None:
+        self.slot.__set__(item, value)
+
+    def raw(self, item: Any) -> Union[bytes, bytearray]:
+        # The value as it's stored (possibly shared), for reading it without copying.
+        return self.slot.__get__(item)
@@ -0,0 +1,85 @@
+__all__ = ("ItemRecord",)
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Tuple,
+)
+from weakref import ref
+
+
+def _compile_builder(cls: type) -> Callable[..., "ItemRecord"]:
+    # A function taking the values of a record (in __slots__ order) & setting them straight into
+    # its slots. Decoding builds a few records per item, going through __init__ (and __setattr__
+    # for every value) is several times slower.
+    names = cls.__slots__
+    values = ", ".join(f"value_{i}" for i in range(len(names)))
+    namespace = {
+        "new": object.__new__,
+        "cls": cls,
+        "set_owner": ItemRecord._owner.__set__,
+        **{f"set_{i}": getattr(cls, name).__set__ for i, name in enumerate(names)},
+    }
+
+    exec(
+        f"def build({values}):\n"
+        "    record = new(cls)\n"
+        "    set_owner(record, None)\n"
+        + "".join(f"    set_{i}(record, value_{i})\n" for i in range(len(names)))
+        + "    return record\n",
+        namespace,
+    )
+
+    return namespace["build"]
+
+
+# Base of the records an item's made of (its pet, seed & sit info and punch options). Items cache
+# their encoding, so a record tells the item(s) it's part of whenever it's changed & they drop it.
+class ItemRecord:
+    # None, a weak reference to the item it's part of or a list of them (if it's been given to
+    # more than one). Weak so that items & their records don't make reference cycles, they'd only
+    # be freed by the garbage collector otherwise.
+    __slots__ = ("_owner",)
+
+    # Builds a record from its values without going through __init__, see _compile_builder.
+    _from_values: Callable[..., "ItemRecord"]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # Dataclasses only get their slots once they're made again by @dataclass(slots=True).
+        if "__slots__" in cls.__dict__:
+            cls._from_values = staticmethod(_compile_builder(cls))
+
+    def __new__(cls, *args: Any, **kwargs: Any) -> "ItemRecord":
+        record = object.__new__(cls)
+        object.__setattr__(record, "_owner", None)
+
+        return record
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        self._changed()
+
+    def _changed(self) -> None:
+        if (owner := self._owner) is None:
+            return
+
+        for item_ref in owner if type(owner) is list else (owner,):
+            if (item := item_ref()) is not None:
+                item.mark_dirty()
+
+    def _add_owner(self, item: Any) -> None:
+        owner = self._owner
+        owners = [] if owner is None else owner if type(owner) is list else [owner]
+        owners = [item_ref for item_ref in owners if item_ref() is not None]
+
+        if not any(item_ref() is item for item_ref in owners):
+            owners.append(ref(item))
+
+        object.__setattr__(self, "_owner", owners[0] if len(owners) == 1 else owners)
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # Owners are left out, they're added back when the record's given to an item again.
+        return None, {name: getattr(self, name) for name in type(self).__slots__}
@@ -1,28 +1,128 @@
 __all__ = ("ItemsData",)
 
+import os
+import sys
+from array import array
+from concurrent.futures import (
+    Executor,
+    ThreadPoolExecutor,
+)
+from struct import Struct
+from tempfile import mkstemp
 from typing import (
+    BinaryIO,
+    Iterable,
     Iterator,
     List,
     Optional,
+    Tuple,
     Union,
 )
+from zlib import decompressobj
 
+from growtopia.net import (
+    UpdateFlags,
+    UpdatePacket,
+    UpdateType,
+)
 from growtopia.utils import (
+    BUFFER_POOL,
     LOG_LEVEL_INFO,
+    Z_BEST_COMPRESSION,
     Buffer,
     CompressionType,
     hash_data,
     log,
+    xor_cipher_many,
+    zlib_compress,
 )
 
 from .constants import (
     LATEST_ITEMS_DATA_VERSION,
 )
 from .item import Item
+from .items_table import (
+    ItemsTable,
+)
+
+# version, item count
+ITEMS_DATA_HEADER: Struct = Struct("<HI")
+
+ITEMS_SNAPSHOT_MAGIC: bytes = b"GTIS"
+ITEMS_SNAPSHOT_VERSION: int = 1
+
+# magic, snapshot version, LATEST_ITEMS_DATA_VERSION, source size, source mtime (ns), source hash,
+# items data hash, items data version, item count. Followed by the item offsets (item count + 1,
+# relative to the start of the snapshot) & the serialised items data.
+ITEMS_SNAPSHOT_HEADER: Struct = Struct("<4sHHQQIIHI")
+
+
+def _decode_items(version: int, data: Union[bytes, Buffer], item_count: int) -> List[Item]:
+    buffer = data if isinstance(data, Buffer) else Buffer(bytearray(data))
+    codec = Item.get_codec(version)
+    items = [codec.decode(buffer, decipher_name=False, view=True) for _ in range(item_count)]
+
+    # Names are deciphered all at once. Bypassing Item.__setattr__ as it doesn't make the items any
+    # different from what was read (the cached encoding stays valid).
+    names = xor_cipher_many([item.name for item in items], [item.id for item in items])
+
+    for item, name in zip(items, names):
+        object.__setattr__(item, "name", name)
+
+    return items
+
+
+def _own_data(path_or_bytes: Union[str, bytearray], compressed: bool) -> Union[str, bytearray]:
+    # Decoded items keep views into the data they're read from (& lazy items data read from it
+    # later on), so it has to be ours: bytes given by the caller are copied, unless they're going
+    # to be decompressed into new ones anyway. Files are read into (or mapped by) our own buffer.
+    if isinstance(path_or_bytes, str) or compressed:
+        return path_or_bytes
+
+    return bytearray(path_or_bytes)
+
+
+def _replace_file(path: str, parts: Iterable[Union[bytes, memoryview]]) -> None:
+    # Written next to path & moved over it, so whoever reads path at the same time gets either the
+    # old file or the new one, never half of one.
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for part in parts:
+                f.write(part)
+
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _read_chunks(stream: BinaryIO, chunk_size: int, decompress: bool) -> Iterator[bytes]:
+    decompressor = decompressobj() if decompress else None
+
+    while chunk := stream.read(chunk_size):
+        if decompressor is None:
+            yield chunk
+            continue
+
+        # Capped at chunk_size of output per call, whatever the compression ratio.
+        while chunk:
+            yield decompressor.decompress(chunk, chunk_size)
+            chunk = decompressor.unconsumed_tail
 
 
 class ItemsData:
-    __slots__ = ("version", "hash", "items")
+    __slots__ = (
+        "version",
+        "_hash",
+        "_items",
+        "_source",
+        "_source_version",
+        "_offsets",
+        "_update_packet",
+    )
 
     @staticmethod
     def load(
@@ -30,63 +130,504 @@ class ItemsData:
         *,
         compressed: bool = False,
         compression_type: CompressionType = CompressionType.ZLIB,
+        lazy: bool = False,
+        mmap: bool = False,
     ) -> "ItemsData":
-        buffer = Buffer.load(path_or_bytes)
+        buffer = Buffer.load(_own_data(path_or_bytes, compressed), mmap=mmap)
 
         if compressed:
             buffer.decompress(compression_type)
 
-        version = buffer.read_int(2)
-        items_data = ItemsData(
-            version,
-            [Item.from_bytes(buffer, version) for _ in range(buffer.read_int())],
+        items_data = ItemsData._load_buffer(buffer, lazy)
+
+        log(
+            LOG_LEVEL_INFO,
+            f"Loaded {path_or_bytes if isinstance(path_or_bytes, str) else 'items data'} file | {items_data}",
         )
 
-        items_data.set_hash()
+        return items_data
+
+    @staticmethod
+    def _load_buffer(buffer: Buffer, lazy: bool) -> "ItemsData":
+        # The buffer's taken over by the items data, see _own_data.
+        version = buffer.read_int(2)
+
+        if lazy:
+            items_data = ItemsData(version, None)
+            items_data._index(buffer, buffer.read_int())
+        else:
+            items_data = ItemsData(version, _decode_items(version, buffer, buffer.read_int()))
+
+        return items_data
+
+    @staticmethod
+    def iter_load(
+        path_or_stream: Union[str, BinaryIO],
+        *,
+        compressed: bool = False,
+        compression_type: CompressionType = CompressionType.ZLIB,
+        chunk_size: int = 1 << 16,
+    ) -> Iterator[Item]:
+        # Yields the items one by one while reading the file (or any binary stream, e.g.
+        # socket.makefile("rb")) chunk by chunk. At most about a chunk of data is held at once,
+        # and none of the items are kept around.
+        if compressed and compression_type != CompressionType.ZLIB:
+            raise ValueError(f"Unknown compression type: {compression_type}")
+
+        if isinstance(path_or_stream, str):
+            with open(path_or_stream, "rb") as f:
+                yield from ItemsData.iter_load(f, compressed=compressed, chunk_size=chunk_size)
+
+            return
+
+        data = bytearray()
+        offset = 0
+        codec = None
+        item_count = 0
+
+        for chunk in _read_chunks(path_or_stream, chunk_size, compressed):
+            del data[:offset]
+            data += chunk
+            offset = 0
+
+            if codec is None:
+                if len(data) < ITEMS_DATA_HEADER.size:
+                    continue
+
+                version, item_count = ITEMS_DATA_HEADER.unpack_from(data)
+                codec = Item.get_codec(version)
+                offset = ITEMS_DATA_HEADER.size
+
+            buffer = Buffer(data)
+            buffer.skip(offset)
+
+            while item_count and codec.find_end(data, buffer.offset) is not None:
+                yield codec.decode(buffer)
+                item_count -= 1
+
+            # Let go of it before data gets resized, a view of it may still be around otherwise.
+            offset = buffer.offset
+            buffer = None
+
+            if codec is not None and not item_count:
+                return
+
+        raise ValueError("Unexpected end of items data")
+
+    @staticmethod
+    def load_parallel(
+        path_or_bytes: Union[str, bytearray],
+        *,
+        compressed: bool = False,
+        compression_type: CompressionType = CompressionType.ZLIB,
+        workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> "ItemsData":
+        # Items are decoded by threads, on free-threaded builds or with the executor given. With the
+        # GIL, threads can't run the decoding at the same time and processes can't send the items
+        # back any faster than they're decoded here (unpickling them takes longer than a plain
+        # load), so it's left to the calling thread.
+        workers = workers or os.cpu_count() or 1
+        buffer = Buffer.load(_own_data(path_or_bytes, compressed))
+
+        if compressed:
+            buffer.decompress(compression_type)
+
+        version, item_count = buffer.read_int(2), buffer.read_int()
+
+        if executor is None and (workers == 1 or getattr(sys, "_is_gil_enabled", lambda: True)()):
+            items_data = ItemsData(version, _decode_items(version, buffer, item_count))
+            workers = 1
+        else:
+            items_data = ItemsData(version, None)
+            items_data._index(buffer, item_count)
+
+            offsets = items_data._offsets
+            chunk_size = max(-(-item_count // (workers * 4)), 1)
+            chunks = []
+
+            # Every chunk gets its own buffer (its own offset) over the same data.
+            for start in range(0, item_count, chunk_size):
+                chunk = Buffer(buffer.data)
+                chunk.skip(offsets[start])
+
+                chunks.append((version, chunk, min(chunk_size, item_count - start)))
+
+            if own_executor := executor is None:
+                executor = ThreadPoolExecutor(workers)
+
+            try:
+                results = executor.map(_decode_items, *zip(*chunks)) if chunks else []
+                items_data.items = [item for items in results for item in items]
+            finally:
+                if own_executor:
+                    executor.shutdown()
 
         log(
             LOG_LEVEL_INFO,
-            f"Loaded {path_or_bytes if isinstance(path_or_bytes, str) else 'items data'} file | {items_data}",
+            f"Loaded {path_or_bytes if isinstance(path_or_bytes, str) else 'items data'} file using {workers} workers | {items_data}",
         )
 
         return items_data
 
+    @staticmethod
+    def load_snapshot(path: str, *, mmap: bool = False) -> "ItemsData":
+        buffer = Buffer.load(path, mmap=mmap)
+        header = ItemsData._read_snapshot_header(buffer)
+
+        if header is None or header[2] != LATEST_ITEMS_DATA_VERSION:
+            raise ValueError(f"Invalid or outdated items data snapshot: {path}")
+
+        *_, items_hash, version, item_count = header
+
+        offsets = array("I")
+        offsets.frombytes(buffer.read_view(offsets.itemsize * (item_count + 1)))
+
+        # The items are in the latest layout, whatever version the items data is.
+        items_data = ItemsData(version, None)
+        items_data.hash = items_hash
+        items_data._items = [None] * item_count
+        items_data._source = buffer
+        items_data._source_version = LATEST_ITEMS_DATA_VERSION
+        items_data._offsets = offsets
+
+        log(LOG_LEVEL_INFO, f"Loaded {path} snapshot | {items_data}")
+
+        return items_data
+
+    @staticmethod
+    def load_cached(
+        path: str,
+        *,
+        cache_path: Optional[str] = None,
+        mmap: bool = False,
+    ) -> "ItemsData":
+        cache_path = cache_path or path + ".snapshot"
+        source_stat = ItemsData._stat(path)
+        header = None
+
+        if os.path.isfile(cache_path):
+            with open(cache_path, "rb") as f:
+                header = ItemsData._read_snapshot_header(
+                    Buffer(bytearray(f.read(ITEMS_SNAPSHOT_HEADER.size)))
+                )
+
+        if header is not None and header[2] != LATEST_ITEMS_DATA_VERSION:
+            header = None  # written for another items data version, rebuild it
+
+        if header is not None and header[3:5] == source_stat:
+            return ItemsData.load_snapshot(cache_path, mmap=mmap)
+
+        source = Buffer.load(path, mmap=mmap)
+        source_hash = source.hash()
+
+        if header is not None and header[5] == source_hash:
+            # The file was only touched, the snapshot itself is still up to date.
+            with open(cache_path, "rb") as f:
+                snapshot = memoryview(f.read())
+
+            _replace_file(
+                cache_path,
+                (
+                    ITEMS_SNAPSHOT_HEADER.pack(*header[:3], *source_stat, *header[5:]),
+                    snapshot[ITEMS_SNAPSHOT_HEADER.size :],
+                ),
+            )
+
+            return ItemsData.load_snapshot(cache_path, mmap=mmap)
+
+        items_data = ItemsData._load_buffer(source, True)
+        items_data.save_snapshot(cache_path, source_stat=source_stat, source_hash=source_hash)
+
+        return items_data
+
+    @staticmethod
+    def _stat(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _read_snapshot_header(buffer: Buffer) -> Optional[tuple]:
+        if buffer.size_remaining < ITEMS_SNAPSHOT_HEADER.size:
+            return None
+
+        header = ITEMS_SNAPSHOT_HEADER.unpack(buffer.read_view(ITEMS_SNAPSHOT_HEADER.size))
+
+        if header[:2] != (ITEMS_SNAPSHOT_MAGIC, ITEMS_SNAPSHOT_VERSION):
+            return None
+
+        return header
+
     def __init__(self, version: Optional[int], items: Optional[List[Item]]) -> None:
         self.version: int = version or 0
-        self.hash: int = 0
-        self.items: List[Item] = items or []
+        self._hash: Optional[int] = None  # computed on first access, see the hash property
+        self._items: List[Optional[Item]] = items or []
+
+        # Lazy mode: source buffer, the version of the layout the items are in there (not always
+        # self.version, see load_snapshot) & the start offset of every item (+ the end of the last
+        # one). Items that are still None in _items get decoded from there when first accessed.
+        self._source: Optional[Buffer] = None
+        self._source_version: int = self.version
+        self._offsets: Optional[array] = None
+
+        # hash, the items' cached encodings & the packet they were packed into, see to_update_packet
+        self._update_packet: Optional[Tuple[int, List[Optional[bytes]], memoryview]] = None
+
+    def _index(self, buffer: Buffer, item_count: int) -> None:
+        codec = Item.get_codec(self.version)
+        offsets = array("I", [buffer.offset])
+
+        for _ in range(item_count):
+            codec.skip(buffer)
+            offsets.append(buffer.offset)
+
+        self._items = [None] * item_count
+        self._source = buffer
+        self._source_version = self.version
+        self._offsets = offsets
+
+    @staticmethod
+    def _load_serialised(data: bytearray) -> "ItemsData":
+        # Loads what to_bytes writes: the items are always in the latest layout, whatever version
+        # the header says. The data's taken over, not copied (see _own_data).
+        buffer = Buffer(data)
+        version, item_count = ITEMS_DATA_HEADER.unpack(buffer.read_view(ITEMS_DATA_HEADER.size))
+
+        if version == LATEST_ITEMS_DATA_VERSION:
+            items_data = ItemsData(version, None)
+            items_data._index(buffer, item_count)
+        else:
+            items_data = ItemsData(
+                version, _decode_items(LATEST_ITEMS_DATA_VERSION, buffer, item_count)
+            )
+
+        items_data.set_hash(data)
+
+        return items_data
+
+    def _item_bytes(self, index: int) -> bytes:
+        # An item as to_bytes would write it, straight from the source when it's still undecoded.
+        if self._items[index] is None and self._source_version == LATEST_ITEMS_DATA_VERSION:
+            return bytes(self._source.data[self._offsets[index] : self._offsets[index + 1]])
+
+        buffer = Buffer()
+        self[index].to_bytes(buffer, LATEST_ITEMS_DATA_VERSION)
+
+        return bytes(buffer.data)
+
+    def _decode(self, index: int) -> Item:
+        self._source.reset_offset()
+        self._source.skip(self._offsets[index])
+
+        codec = Item.get_codec(self._source_version)
+        item = self._items[index] = codec.decode(self._source, view=True)
+
+        return item
+
+    @property
+    def items(self) -> List[Item]:
+        if self._source is not None:
+            for index, item in enumerate(self._items):
+                if item is None:
+                    self._decode(index)
+
+            self._source = self._offsets = None
+
+        return self._items
+
+    @items.setter
+    def items(self, items: List[Item]) -> None:
+        self._items = items
+        self._source = self._offsets = None
+
+    @property
+    def hash(self) -> int:
+        # Serialising & hashing the whole file is the slowest part of loading it, and most callers
+        # never look at the hash, so it's only done when asked for.
+        if self._hash is None:
+            self.set_hash()
+
+        return self._hash
+
+    @hash.setter
+    def hash(self, value: int) -> None:
+        self._hash = value
+
+    @property
+    def is_lazy(self) -> bool:
+        return self._source is not None
+
+    def estimate_size(self) -> int:
+        # What to_bytes is going to write, exact unless there are edited items (then a bit under).
+        size = ITEMS_DATA_HEADER.size
+        codec = Item.get_codec(LATEST_ITEMS_DATA_VERSION)
+
+        for index, item in enumerate(self._items):
+            if item is None:
+                size += self._offsets[index + 1] - self._offsets[index]
+            elif item._encoded is not None:
+                size += len(item._encoded)
+            else:
+                size += codec.size_hint(item)
+
+        return size
+
+    def _parts(self) -> Iterator[Union[bytes, memoryview]]:
+        # Every item as to_bytes writes it, without writing anything yet.
+        # Untouched items can only be copied over as they are if they're already laid out the way
+        # we're writing them.
+        copy_raw = self._source is not None and self._source_version == LATEST_ITEMS_DATA_VERSION
+        source_view = self._source.view if copy_raw else None
+        encode_buffer = Buffer()
+        run_start = None  # offset of the untouched items not yielded yet, they're contiguous
+
+        for index, item in enumerate(self._items):
+            if item is None and copy_raw:
+                if run_start is None:
+                    run_start = self._offsets[index]
+
+                continue
+
+            if run_start is not None:
+                yield source_view[run_start : self._offsets[index]]
+                run_start = None
+
+            item = item or self._decode(index)
+
+            if item._encoded is None:
+                item.to_bytes(encode_buffer, LATEST_ITEMS_DATA_VERSION)  # caches the encoding
+
+            yield item._encoded
+
+        if run_start is not None:
+            yield source_view[run_start : self._offsets[len(self._items)]]
 
     def to_bytes(
         self,
         *,
         compress: bool = False,
         compression_type: CompressionType = CompressionType.ZLIB,
+        compression_level: int = Z_BEST_COMPRESSION,
+        buffer: Optional[Buffer] = None,
     ) -> Buffer:
-        buffer = Buffer()
-        buffer.write_int(self.version, 2)
-        buffer.write_int(len(self.items), 4)
+        # Written into buffer if given (e.g. one from a BufferPool), otherwise into a new one that's
+        # allocated once, at its final size.
+        parts = [ITEMS_DATA_HEADER.pack(self.version, len(self)), *self._parts()]
 
-        for item in self.items:
-            item.to_bytes(buffer, LATEST_ITEMS_DATA_VERSION)
+        if buffer is None:
+            buffer = Buffer(bytearray().join(parts))
+            buffer.skip(len(buffer))
+        else:
+            buffer.write_many(parts)
 
         if compress:
-            buffer.compress(compression_type)
+            buffer.compress(compression_type, compression_level)
 
         log(LOG_LEVEL_INFO, f"Serialised items data | {self}")
 
         return buffer
 
+    def save_snapshot(
+        self,
+        path: str,
+        *,
+        source_stat: Tuple[int, int] = (0, 0),
+        source_hash: int = 0,
+    ) -> None:
+        data = self.to_bytes().data
+        buffer = Buffer(data)
+        buffer.skip(6)  # version & item count
+
+        # Offsets are relative to the snapshot start, the items data follows the header & offsets.
+        # to_bytes writes the items in the latest layout, so that's what they're indexed (& later
+        # decoded) with.
+        offsets = array("I")
+        start = ITEMS_SNAPSHOT_HEADER.size + offsets.itemsize * (len(self) + 1)
+        codec = Item.get_codec(LATEST_ITEMS_DATA_VERSION)
+        offsets.append(start + buffer.offset)
+
+        for _ in range(len(self)):
+            codec.skip(buffer)
+            offsets.append(start + buffer.offset)
+
+        header = ITEMS_SNAPSHOT_HEADER.pack(
+            ITEMS_SNAPSHOT_MAGIC,
+            ITEMS_SNAPSHOT_VERSION,
+            LATEST_ITEMS_DATA_VERSION,
+            *source_stat,
+            source_hash,
+            self.set_hash(data),
+            self.version,
+            len(self),
+        )
+
+        _replace_file(path, (header, offsets.tobytes(), data))
+
+        log(LOG_LEVEL_INFO, f"Saved items data snapshot to {path} | {self}")
+
+    def _encodings(self) -> List[Optional[bytes]]:
+        return [None if item is None else item._encoded for item in self._items]
+
+    def to_update_packet(self) -> memoryview:
+        # The whole SEND_ITEMS_DATA packet (compressed items data as its extra data), packed once &
+        # shared between every peer it's sent to. It's rebuilt if the hash changed or any item was
+        # edited (which drops its cached encoding, so it won't be the one the packet was built
+        # from). Decoding more items of a lazy items data also counts, at worst a needless rebuild.
+        encodings = self._encodings()
+
+        if self._update_packet is not None:
+            packet_hash, packet_encodings, packet = self._update_packet
+
+            if packet_hash == self._hash and packet_encodings == encodings:
+                return packet
+
+        # Only needed until it's compressed, so serialised into a pooled buffer. Reserved at the
+        # estimated size up front, so the buffer's made (or grown) once, before any item's encoded.
+        with BUFFER_POOL.buffer(self.estimate_size()) as buffer:
+            self.to_bytes(buffer=buffer)
+            self.set_hash(buffer.data)
+            extra_data = bytes(zlib_compress(buffer.view))
+
+        packet = UpdatePacket(
+            update_type=UpdateType.SEND_ITEMS_DATA,
+            flags=UpdateFlags.EXTRA_DATA,
+            extra_data=extra_data,
+        )
+
+        # Encodings taken again, to_bytes fills them in for the items that were edited.
+        packet = memoryview(bytes(packet.pack())).toreadonly()
+        self._update_packet = (self._hash, self._encodings(), packet)
+
+        log(LOG_LEVEL_INFO, f"Built items data update packet ({len(packet)} bytes) | {self}")
+
+        return packet
+
+    def fingerprints(self) -> array:
+        # hash_data of every item as it's serialised, for telling which ones changed between two
+        # items data (see ItemsDataPatch).
+        return array("I", map(hash_data, map(self._item_bytes, range(len(self)))))
+
+    def to_table(self) -> ItemsTable:
+        return ItemsTable.from_items(self)
+
     def set_hash(self, data: Optional[bytearray] = None) -> int:
-        self.hash = hash_data(data or self.to_bytes().data)
+        self._hash = hash_data(data or self.to_bytes().data)
+        return self._hash
 
     def __str__(self) -> str:
-        return f"<ItemsData: version={self.version}, hash={self.hash}, items={len(self.items)}>"
+        return f"<ItemsData: version={self.version}, hash={self._hash}, items={len(self)}>"
 
-    def __getitem__(self, index: int) -> "Item":
-        return self.items[index]
+    def __getitem__(self, index: Union[int, slice]) -> Union[Item, List[Item]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        return self._items[index] or self._decode(index % len(self))
 
     def __iter__(self) -> Iterator[Item]:
-        return iter(self.items)
+        if self._source is None:
+            return iter(self._items)
+
+        return (self[index] for index in range(len(self)))
 
     def __len__(self) -> int:
-        return len(self.items)
+        return len(self._items)
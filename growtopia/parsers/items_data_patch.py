@@ -0,0 +1,159 @@
+__all__ = ("ItemsDataPatch",)
+
+from dataclasses import (
+    dataclass,
+    field,
+)
+from struct import Struct
+from typing import (
+    Dict,
+    List,
+    Union,
+)
+
+from growtopia.utils import (
+    LOG_LEVEL_INFO,
+    Z_BEST_COMPRESSION,
+    Buffer,
+    CompressionType,
+    log,
+)
+
+from .items_data import (
+    ITEMS_DATA_HEADER,
+    ItemsData,
+)
+
+ITEMS_DATA_PATCH_MAGIC: bytes = b"GTIP"
+ITEMS_DATA_PATCH_VERSION: int = 1
+
+# magic, patch version, items data version, base item count, item count, items data hash, entry
+# count. Followed by the entries: item index, size & the serialised item.
+ITEMS_DATA_PATCH_HEADER: Struct = Struct("<4sHHIIII")
+ITEMS_DATA_PATCH_ENTRY: Struct = Struct("<II")
+
+
+# The items that differ between two items data, found by comparing their fingerprints. Applying it
+# onto the base items data rebuilds the target one (checked against its hash) without encoding or
+# decoding any of the untouched items.
+@dataclass
+class ItemsDataPatch:
+    version: int = 0
+    base_item_count: int = 0
+    item_count: int = 0
+    hash: int = 0
+
+    # Item index -> item serialised the way ItemsData.to_bytes does, for every added/changed item.
+    items: Dict[int, bytes] = field(default_factory=dict)
+
+    @staticmethod
+    def diff(base: ItemsData, target: ItemsData) -> "ItemsDataPatch":
+        base_fingerprints = base.fingerprints()
+        patch = ItemsDataPatch(target.version, len(base), len(target), target.hash)
+
+        for index, fingerprint in enumerate(target.fingerprints()):
+            if index >= len(base_fingerprints) or base_fingerprints[index] != fingerprint:
+                patch.items[index] = target._item_bytes(index)
+
+        log(LOG_LEVEL_INFO, f"Diffed items data | {patch}")
+
+        return patch
+
+    @staticmethod
+    def load(
+        path_or_bytes: Union[str, bytearray],
+        *,
+        compressed: bool = False,
+        compression_type: CompressionType = CompressionType.ZLIB,
+    ) -> "ItemsDataPatch":
+        buffer = Buffer.load(path_or_bytes)
+
+        if compressed:
+            buffer.decompress(compression_type)
+
+        magic, patch_version, *header, entry_count = ITEMS_DATA_PATCH_HEADER.unpack(
+            buffer.read_view(ITEMS_DATA_PATCH_HEADER.size)
+        )
+
+        if magic != ITEMS_DATA_PATCH_MAGIC or patch_version != ITEMS_DATA_PATCH_VERSION:
+            raise ValueError("Invalid or unsupported items data patch")
+
+        patch = ItemsDataPatch(*header)
+
+        for _ in range(entry_count):
+            index, size = ITEMS_DATA_PATCH_ENTRY.unpack(
+                buffer.read_view(ITEMS_DATA_PATCH_ENTRY.size)
+            )
+            patch.items[index] = bytes(buffer.read_view(size))
+
+        return patch
+
+    def to_bytes(
+        self,
+        *,
+        compress: bool = False,
+        compression_type: CompressionType = CompressionType.ZLIB,
+        compression_level: int = Z_BEST_COMPRESSION,
+    ) -> Buffer:
+        parts = [
+            ITEMS_DATA_PATCH_HEADER.pack(
+                ITEMS_DATA_PATCH_MAGIC,
+                ITEMS_DATA_PATCH_VERSION,
+                self.version,
+                self.base_item_count,
+                self.item_count,
+                self.hash,
+                len(self.items),
+            )
+        ]
+
+        for index, data in sorted(self.items.items()):
+            parts.append(ITEMS_DATA_PATCH_ENTRY.pack(index, len(data)))
+            parts.append(data)
+
+        buffer = Buffer(bytearray(b"".join(parts)))
+
+        if compress:
+            buffer.compress(compression_type, compression_level)
+
+        return buffer
+
+    def apply(self, items_data: ItemsData) -> ItemsData:
+        if len(items_data) != self.base_item_count:
+            raise ValueError(
+                f"Items data patch expects {self.base_item_count} items, got {len(items_data)}"
+            )
+
+        parts = [ITEMS_DATA_HEADER.pack(self.version, self.item_count)]
+
+        for index in range(self.item_count):
+            parts.append(self.items.get(index) or items_data._item_bytes(index))
+
+        patched = ItemsData._load_serialised(bytearray(b"".join(parts)))
+
+        if patched.hash != self.hash:
+            raise ValueError(
+                f"Patched items data hash mismatch, expected {self.hash}, got {patched.hash}"
+            )
+
+        log(LOG_LEVEL_INFO, f"Patched items data | {patched}")
+
+        return patched
+
+    @property
+    def added(self) -> List[int]:
+        return [index for index in self.items if index >= self.base_item_count]
+
+    @property
+    def changed(self) -> List[int]:
+        return [index for index in self.items if index < self.base_item_count]
+
+    @property
+    def removed(self) -> List[int]:
+        return list(range(self.item_count, self.base_item_count))
+
+    def __str__(self) -> str:
+        return (
+            f"<ItemsDataPatch: version={self.version}, hash={self.hash}, added={len(self.added)}, "
+            f"changed={len(self.changed)}, removed={len(self.removed)}>"
+        )
@@ -0,0 +1,147 @@
+__all__ = ("ItemsDataReloader",)
+
+from asyncio import (
+    Lock,
+    Task,
+    create_task,
+    get_running_loop,
+    sleep,
+)
+from concurrent.futures import (
+    Executor,
+)
+from inspect import (
+    isawaitable,
+)
+from typing import (
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from growtopia.utils import (
+    LOG_LEVEL_ERROR,
+    LOG_LEVEL_INFO,
+    LOG_LEVEL_WARNING,
+    log,
+)
+
+from .items_data import (
+    ItemsData,
+)
+from .items_data_patch import (
+    ItemsDataPatch,
+)
+
+ItemsDataCallback = Callable[[ItemsData, List[int]], Union[None, Awaitable[None]]]
+
+
+def _load_changes(path: str, items_data: ItemsData) -> Tuple[ItemsData, List[int]]:
+    new_items_data = ItemsData.load(path)
+    patch = ItemsDataPatch.diff(items_data, new_items_data)
+
+    # Ids, not indices; removed items are looked up in the old items data.
+    changed = [new_items_data[index].id for index in sorted(patch.items)]
+    changed += [items_data[index].id for index in patch.removed]
+
+    return new_items_data, changed
+
+
+# Holds the current ItemsData of a file & swaps in a new one whenever the file changes (polled,
+# by size & mtime). The new file is parsed & diffed in an executor, off the event loop, and only
+# swapped in once it's fully loaded. Readers get either the old or the new ItemsData, never
+# something in between, as long as they go through items_data every time instead of keeping it.
+class ItemsDataReloader:
+    __slots__ = (
+        "path",
+        "interval",
+        "executor",
+        "_items_data",
+        "_stat",
+        "_callbacks",
+        "_lock",
+        "_task",
+    )
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        interval: float = 1.0,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.path: str = path
+        self.interval: float = interval
+        self.executor: Optional[Executor] = executor  # None for the loop's default one
+
+        # Stat'd before loading, a change made while it loads still gets picked up.
+        self._stat: Tuple[int, int] = ItemsData._stat(path)
+        self._items_data: ItemsData = ItemsData.load(path)
+
+        self._callbacks: List[ItemsDataCallback] = []
+        self._lock: Lock = Lock()
+        self._task: Optional[Task] = None
+
+    @property
+    def items_data(self) -> ItemsData:
+        return self._items_data
+
+    def subscribe(self, callback: ItemsDataCallback) -> None:
+        # Called with the new ItemsData & the ids of the items that were added, changed or removed.
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: ItemsDataCallback) -> None:
+        self._callbacks.remove(callback)
+
+    async def reload(self, *, force: bool = False) -> bool:
+        async with self._lock:
+            stat = ItemsData._stat(self.path)
+
+            if stat == self._stat and not force:
+                return False
+
+            items_data, changed = await get_running_loop().run_in_executor(
+                self.executor, _load_changes, self.path, self._items_data
+            )
+
+            self._stat = stat
+            self._items_data = items_data
+
+            log(
+                LOG_LEVEL_INFO,
+                f"Reloaded {self.path} ({len(changed)} items changed) | {items_data}",
+            )
+
+            # One failing callback doesn't keep the others from hearing about the new items data
+            # (or make it look like the reload itself failed).
+            for callback in list(self._callbacks):
+                try:
+                    if isawaitable(result := callback(items_data, changed)):
+                        await result
+                except Exception as e:
+                    log(LOG_LEVEL_ERROR, f"Items data reload callback {callback!r} failed: {e!r}")
+
+            return True
+
+    async def watch(self) -> None:
+        while True:
+            await sleep(self.interval)
+
+            try:
+                await self.reload()
+            except Exception as e:  # most likely caught mid-write, keep the old one & retry
+                log(LOG_LEVEL_WARNING, f"Failed to reload {self.path}: {e!r}")
+
+    def start(self) -> Task:
+        if self._task is None or self._task.done():
+            self._task = create_task(self.watch())
+
+        return self._task
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
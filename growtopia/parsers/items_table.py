@@ -0,0 +1,129 @@
+__all__ = ("ItemsTable",)
+
+from array import array
+from itertools import (
+    compress,
+    repeat,
+)
+from operator import (
+    and_,
+    eq,
+    ge,
+    le,
+)
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .constants import (
+    ITEM_ATTR_SIZES,
+)
+from .enums import *
+from .item import Item
+
+ITEMS_TABLE_COLUMNS: Tuple[str, ...] = (
+    "id",
+    "properties",
+    "category",
+    "material_type",
+    "collision_type",
+    "break_hits",
+    "clothing_type",
+    "rarity",
+    "max_amount",
+    "grow_time",
+)
+
+ITEMS_TABLE_TYPECODES: Dict[int, str] = {
+    1: "B",
+    2: "H",
+    4: "I",
+}
+
+
+# Column-oriented copy of the scalar item attributes. Filters go over whole columns at once
+# (map/compress over the arrays, no per-item python code) and return arrays of item ids.
+class ItemsTable:
+    __slots__ = ("columns",)
+
+    @staticmethod
+    def from_items(items: Iterable[Item]) -> "ItemsTable":
+        table = ItemsTable()
+        columns = [table.columns[column] for column in ITEMS_TABLE_COLUMNS]
+
+        for item in items:
+            for column, attr in zip(columns, ITEMS_TABLE_COLUMNS):
+                column.append(getattr(item, attr))
+
+        return table
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, array] = {
+            column: array(ITEMS_TABLE_TYPECODES[ITEM_ATTR_SIZES[column]])
+            for column in ITEMS_TABLE_COLUMNS
+        }
+
+    def _select(self, selector: Iterable) -> array:
+        return array("I", compress(self.columns["id"], selector))
+
+    def _matches(
+        self,
+        column: str,
+        value: Union[int, Tuple[Optional[int], Optional[int]]],
+    ) -> Iterator:
+        values = self.columns[column]
+
+        if column == "properties":
+            value = int(value)
+            return map(eq, map(and_, values, repeat(value)), repeat(value))
+
+        if not isinstance(value, tuple):
+            return map(eq, values, repeat(int(value)))
+
+        low, high = value
+
+        if low is None:
+            return map(le, values, repeat(high))
+        elif high is None:
+            return map(ge, values, repeat(low))
+
+        return map(and_, map(ge, values, repeat(low)), map(le, values, repeat(high)))
+
+    def where(self, **conditions: Union[int, Tuple[Optional[int], Optional[int]]]) -> array:
+        # column=value for an exact match, column=(low, high) for an inclusive range (either end
+        # may be None), properties=flags for items having all the given flags.
+        if not conditions:
+            return array("I", self.columns["id"])
+
+        matches = [self._matches(column, value) for column, value in conditions.items()]
+        selector = matches[0]
+
+        for match in matches[1:]:
+            selector = map(and_, selector, match)
+
+        return self._select(selector)
+
+    # Flags work like they do in where: items having all of them. with_any_property for items
+    # having at least one (the same thing for a single flag).
+    def with_property(self, item_property: ItemProperty) -> array:
+        return self.where(properties=item_property)
+
+    def with_any_property(self, item_property: ItemProperty) -> array:
+        return self._select(map(and_, self.columns["properties"], repeat(int(item_property))))
+
+    def of_category(self, item_category: ItemCategory) -> array:
+        return self.where(category=item_category)
+
+    def in_range(self, column: str, low: Optional[int] = None, high: Optional[int] = None) -> array:
+        return self.where(**{column: (low, high)})
+
+    def __getitem__(self, column: str) -> array:
+        return self.columns[column]
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
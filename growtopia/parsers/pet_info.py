@@ -8,9 +8,13 @@ from growtopia.utils import (
     Buffer,
 )
 
+from .item_record import (
+    ItemRecord,
+)
+
 
-@dataclass
-class ItemPetInfo:
+@dataclass(slots=True)
+class ItemPetInfo(ItemRecord):
     name: str = ""
     prefix: str = ""
     suffix: str = ""
@@ -18,7 +22,7 @@ class ItemPetInfo:
 
     @staticmethod
     def from_bytes(data: Buffer) -> "ItemPetInfo":
-        return ItemPetInfo(
+        return ItemPetInfo._from_values(
             data.read_str(data.read_int(2)),
             data.read_str(data.read_int(2)),
             data.read_str(data.read_int(2)),
@@ -0,0 +1,257 @@
+__all__ = ("PlayerTributeData",)
+
+from struct import Struct
+from typing import (
+    BinaryIO,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from growtopia.net import (
+    UpdateFlags,
+    UpdatePacket,
+    UpdateType,
+)
+from growtopia.utils import (
+    BUFFER_POOL,
+    LOG_LEVEL_INFO,
+    Z_BEST_COMPRESSION,
+    Buffer,
+    CompressionType,
+    hash_data,
+    log,
+    zlib_compress,
+)
+
+from .items_data import (
+    _read_chunks,
+)
+
+LATEST_PLAYER_TRIBUTE_VERSION = 1
+
+# version, then each section: a u32 count of names & the names (u16 length prefix). Anything after
+# the sections is kept as it is.
+PLAYER_TRIBUTE_VERSION = Struct("<H")
+PLAYER_TRIBUTE_COUNT = Struct("<I")
+PLAYER_TRIBUTE_NAME_LENGTH = Struct("<H")
+
+PLAYER_TRIBUTE_SECTIONS: Tuple[str, ...] = (
+    "epic_players",
+    "exceptional_mentors",
+    "charity_champions",
+)
+
+
+class PlayerTributeData:
+    __slots__ = (
+        "version",
+        "epic_players",
+        "exceptional_mentors",
+        "charity_champions",
+        "_tail",
+        "_hash",
+        "_update_packet",
+    )
+
+    @staticmethod
+    def load(
+        path_or_bytes: Union[str, bytearray],
+        *,
+        compressed: bool = False,
+        compression_type: CompressionType = CompressionType.ZLIB,
+    ) -> "PlayerTributeData":
+        buffer = Buffer.load(path_or_bytes)
+
+        if compressed:
+            buffer.decompress(compression_type)
+
+        player_tribute_data = PlayerTributeData(buffer.read_int(2))
+
+        for section in PLAYER_TRIBUTE_SECTIONS:
+            names = getattr(player_tribute_data, section)
+
+            for _ in range(buffer.read_int(4)):
+                if buffer.size_remaining < PLAYER_TRIBUTE_NAME_LENGTH.size:
+                    raise ValueError("Unexpected end of player tribute data")
+
+                names.append(buffer.read_str(buffer.read_int(2)))
+
+        if buffer.size_remaining < 0:
+            raise ValueError("Unexpected end of player tribute data")
+
+        player_tribute_data._tail = bytes(buffer.view_at_offset)
+
+        log(
+            LOG_LEVEL_INFO,
+            f"Loaded {path_or_bytes if isinstance(path_or_bytes, str) else 'player tribute data'} file | {player_tribute_data}",
+        )
+
+        return player_tribute_data
+
+    @staticmethod
+    def iter_load(
+        path_or_stream: Union[str, BinaryIO],
+        *,
+        compressed: bool = False,
+        compression_type: CompressionType = CompressionType.ZLIB,
+        chunk_size: int = 1 << 16,
+    ) -> Iterator[Tuple[str, str]]:
+        # Yields (section, name) while reading the file (or any binary stream) chunk by chunk, like
+        # ItemsData.iter_load.
+        if compressed and compression_type != CompressionType.ZLIB:
+            raise ValueError(f"Unknown compression type: {compression_type}")
+
+        if isinstance(path_or_stream, str):
+            with open(path_or_stream, "rb") as f:
+                yield from PlayerTributeData.iter_load(
+                    f, compressed=compressed, chunk_size=chunk_size
+                )
+
+            return
+
+        chunks = _read_chunks(path_or_stream, chunk_size, compressed)
+        data = bytearray()
+        offset = 0
+
+        def read(size: int) -> memoryview:
+            nonlocal data, offset
+
+            while len(data) - offset < size:
+                if (chunk := next(chunks, None)) is None:
+                    raise ValueError("Unexpected end of player tribute data")
+
+                del data[:offset]
+                data += chunk
+                offset = 0
+
+            offset += size
+
+            return memoryview(data)[offset - size : offset]
+
+        read(PLAYER_TRIBUTE_VERSION.size).release()
+
+        for section in PLAYER_TRIBUTE_SECTIONS:
+            with read(PLAYER_TRIBUTE_COUNT.size) as count:
+                count = PLAYER_TRIBUTE_COUNT.unpack(count)[0]
+
+            for _ in range(count):
+                with read(PLAYER_TRIBUTE_NAME_LENGTH.size) as length:
+                    length = PLAYER_TRIBUTE_NAME_LENGTH.unpack(length)[0]
+
+                with read(length) as name:
+                    name = str(name, "utf-8")
+
+                yield section, name
+
+    def __init__(
+        self,
+        version: int = LATEST_PLAYER_TRIBUTE_VERSION,
+        *,
+        epic_players: Optional[List[str]] = None,
+        exceptional_mentors: Optional[List[str]] = None,
+        charity_champions: Optional[List[str]] = None,
+    ) -> None:
+        self.version: int = version
+        self.epic_players: List[str] = epic_players or []
+        self.exceptional_mentors: List[str] = exceptional_mentors or []
+        self.charity_champions: List[str] = charity_champions or []
+
+        self._tail: bytes = b""
+        self._hash: Optional[int] = None  # computed on first access, see the hash property
+
+        # What the packet was built from & the packet, see to_update_packet
+        self._update_packet: Optional[Tuple[tuple, memoryview]] = None
+
+    @property
+    def hash(self) -> int:
+        if self._hash is None:
+            self.set_hash()
+
+        return self._hash
+
+    @hash.setter
+    def hash(self, value: int) -> None:
+        self._hash = value
+
+    def _parts(self) -> List[bytes]:
+        parts = [PLAYER_TRIBUTE_VERSION.pack(self.version)]
+
+        for section in PLAYER_TRIBUTE_SECTIONS:
+            names = getattr(self, section)
+            parts.append(PLAYER_TRIBUTE_COUNT.pack(len(names)))
+
+            for name in names:
+                name = name.encode()
+                parts += (PLAYER_TRIBUTE_NAME_LENGTH.pack(len(name)), name)
+
+        parts.append(self._tail)
+
+        return parts
+
+    def to_bytes(
+        self,
+        *,
+        compress: bool = False,
+        compression_type: CompressionType = CompressionType.ZLIB,
+        compression_level: int = Z_BEST_COMPRESSION,
+        buffer: Optional[Buffer] = None,
+    ) -> Buffer:
+        parts = self._parts()
+
+        if buffer is None:
+            buffer = Buffer(bytearray().join(parts))
+            buffer.skip(len(buffer))
+        else:
+            buffer.write_many(parts)
+
+        if compress:
+            buffer.compress(compression_type, compression_level)
+
+        return buffer
+
+    def _state(self) -> tuple:
+        return (
+            self.version,
+            self._tail,
+            *(tuple(getattr(self, section)) for section in PLAYER_TRIBUTE_SECTIONS),
+        )
+
+    def to_update_packet(self) -> memoryview:
+        # The whole SEND_PLAYER_TRIBUTE_DATA packet, packed & compressed once and shared between
+        # every peer it's sent to, until the data changes.
+        state = self._state()
+
+        if self._update_packet is not None and self._update_packet[0] == state:
+            return self._update_packet[1]
+
+        with BUFFER_POOL.buffer() as buffer:
+            self.to_bytes(buffer=buffer)
+            self.set_hash(buffer.data)
+            extra_data = bytes(zlib_compress(buffer.view))
+
+        packet = UpdatePacket(
+            update_type=UpdateType.SEND_PLAYER_TRIBUTE_DATA,
+            flags=UpdateFlags.EXTRA_DATA,
+            extra_data=extra_data,
+        )
+
+        packet = memoryview(packet.to_bytes()).toreadonly()
+        self._update_packet = (state, packet)
+
+        log(LOG_LEVEL_INFO, f"Built player tribute update packet ({len(packet)} bytes) | {self}")
+
+        return packet
+
+    def set_hash(self, data: Optional[bytearray] = None) -> int:
+        self._hash = hash_data(data or self.to_bytes().data)
+        return self._hash
+
+    def __str__(self) -> str:
+        counts = ", ".join(
+            f"{section}={len(getattr(self, section))}" for section in PLAYER_TRIBUTE_SECTIONS
+        )
+
+        return f"<PlayerTributeData: version={self.version}, hash={self._hash}, {counts}>"
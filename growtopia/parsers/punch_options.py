@@ -4,15 +4,21 @@ from dataclasses import (
     dataclass,
     field,
 )
+from sys import intern
 from typing import (
     Any,
     Iterator,
     List,
     Literal,
+    Optional,
+)
+
+from .item_record import (
+    ItemRecord,
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemPunchOption:
     op: str
     args: List[Any] = field(default_factory=list)
@@ -70,32 +76,73 @@ class ItemPunchOption:
         return f"{self.op}{args}"
 
 
-@dataclass
-class ItemPunchOptions:
-    options: List[ItemPunchOption] = field(default_factory=list)
+# Kept as the string it was read from until the options are first needed (iterated, accessed or
+# added to), which most never are. Until then it's also written back exactly as it was read.
+class ItemPunchOptions(ItemRecord):
+    __slots__ = ("_raw", "_options")
+
+    def __init__(self, options: Optional[List[ItemPunchOption]] = None) -> None:
+        self._raw: Optional[str] = None
+        self._options: Optional[List[ItemPunchOption]] = options if options is not None else []
 
     @staticmethod
     def from_str(string_opts: str) -> "ItemPunchOptions":
-        punch_opts = ItemPunchOptions()
+        return ItemPunchOptions._from_values(string_opts, None)
 
+    @staticmethod
+    def _parse(string_opts: str) -> List[ItemPunchOption]:
         if not string_opts:
-            return punch_opts
+            return []
+
+        return [
+            ItemPunchOption(op=intern((splt := op.split(":"))[0]), args=splt[1:])
+            for op in string_opts.split(";")
+        ]
+
+    @property
+    def options(self) -> List[ItemPunchOption]:
+        if self._options is None:
+            # Can be changed from here on, so it's the options that get written from now on. Not a
+            # change in itself (they're still the same options), so it doesn't go through
+            # __setattr__. Reading them leaves the item's cached encoding alone.
+            object.__setattr__(self, "_options", self._parse(self._raw))
+            object.__setattr__(self, "_raw", None)
 
-        for op in string_opts.split(";"):
-            punch_opts.add_punch_option(
-                ItemPunchOption(op=(splt := op.split(":"))[0], args=splt[1:])
-            )
+        return self._options
 
-        return punch_opts
+    @options.setter
+    def options(self, options: List[ItemPunchOption]) -> None:
+        self._raw = None
+        self._options = options
 
     def to_string(self) -> str:
         return self.__str__()
 
+    # Changes made to the list (or an option in it) directly aren't seen, go through these or set
+    # options again (or mark the item dirty) after.
     def add_punch_option(self, option: ItemPunchOption) -> None:
         self.options.append(option)
+        self._changed()
+
+    def remove_punch_option(self, option: ItemPunchOption) -> None:
+        self.options.remove(option)
+        self._changed()
 
     def __str__(self) -> str:
-        return ";".join(str(i) for i in self.options)
+        if self._raw is not None:
+            return self._raw
+
+        return ";".join(str(i) for i in self._options)
+
+    def __repr__(self) -> str:
+        options = self._options if self._raw is None else self._parse(self._raw)
+        return f"ItemPunchOptions(options={options!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ItemPunchOptions):
+            return NotImplemented
+
+        return str(self) == str(other)
 
     def __iter__(self) -> Iterator[ItemPunchOption]:
         return iter(self.options)
@@ -3,14 +3,21 @@ __all__ = ("ItemSeedInfo",)
 from dataclasses import (
     dataclass,
 )
+from struct import Struct
 
 from growtopia.utils import (
     Buffer,
 )
 
+from .item_record import (
+    ItemRecord,
+)
+
+ITEM_SEED_INFO_STRUCT: Struct = Struct("<BBBBII")
+
 
-@dataclass
-class ItemSeedInfo:
+@dataclass(slots=True)
+class ItemSeedInfo(ItemRecord):
     base_index: int = 0
     overlay_index: int = 0
 
@@ -22,14 +29,7 @@ class ItemSeedInfo:
 
     @staticmethod
     def from_bytes(data: Buffer) -> "ItemSeedInfo":
-        return ItemSeedInfo(
-            data.read_int(1),
-            data.read_int(1),
-            data.read_int(1),
-            data.read_int(1),
-            data.read_int(4),
-            data.read_int(4),
-        )
+        return ItemSeedInfo._from_values(*data.read_struct(ITEM_SEED_INFO_STRUCT))
 
     def to_bytes(self, buffer: Buffer) -> None:
         buffer.write_int(self.base_index, 1)
@@ -3,14 +3,22 @@ __all__ = ("ItemSitInfo",)
 from dataclasses import (
     dataclass,
 )
+from struct import Struct
 
 from growtopia.utils import (
     Buffer,
 )
 
+from .item_record import (
+    ItemRecord,
+)
+
+# can_player_sit, the 6 offsets & the size of sit_overlay_texture
+ITEM_SIT_INFO_STRUCT: Struct = Struct("<B6IH")
 
-@dataclass
-class ItemSitInfo:
+
+@dataclass(slots=True)
+class ItemSitInfo(ItemRecord):
     can_player_sit: bool = False
 
     sit_player_offset_x: int = 0
@@ -26,16 +34,9 @@ class ItemSitInfo:
 
     @staticmethod
     def from_bytes(data: Buffer) -> "ItemSitInfo":
-        return ItemSitInfo(
-            bool(data.read_int(1)),
-            data.read_int(4),
-            data.read_int(4),
-            data.read_int(4),
-            data.read_int(4),
-            data.read_int(4),
-            data.read_int(4),
-            data.read_str(data.read_int(2)),
-        )
+        can_player_sit, *offsets, texture_size = data.read_struct(ITEM_SIT_INFO_STRUCT)
+
+        return ItemSitInfo._from_values(bool(can_player_sit), *offsets, data.read_str(texture_size))
 
     def to_bytes(self, buffer: Buffer) -> None:
         buffer.write_int(int(self.can_player_sit), 1)
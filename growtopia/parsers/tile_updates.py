@@ -0,0 +1,127 @@
+__all__ = ("TileUpdateCoalescer", "TileUpdateMetrics")
+
+from dataclasses import (
+    dataclass,
+)
+from struct import Struct
+from typing import (
+    Dict,
+    List,
+    Tuple,
+)
+
+from growtopia.net import (
+    UpdateFlags,
+    UpdatePacket,
+    UpdateType,
+)
+
+from .world import World
+
+# Each tile in a SEND_TILE_UPDATE_DATA_MULTIPLE packet is its position followed by the tile as
+# it's written in the world. The number of tiles goes in the packet's int_.
+TILE_UPDATE_POSITION = Struct("<ii")
+
+# Everything but the tile data in a packed update packet (header & extra data length).
+TILE_UPDATE_OVERHEAD = UpdatePacket(extra_data=b"").packed_size
+
+
+@dataclass(slots=True)
+class TileUpdateMetrics:
+    updates: int = 0  # tile changes queued, duplicates included
+    tiles: int = 0  # tiles sent, after deduplicating
+    packets: int = 0
+    packet_bytes: int = 0
+
+    # What a packet per change would have cost (with the data of the tile when it was sent).
+    unbatched_packets: int = 0
+    unbatched_bytes: int = 0
+
+    @property
+    def packets_saved(self) -> int:
+        return self.unbatched_packets - self.packets
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.unbatched_bytes - self.packet_bytes
+
+
+# Collects the tiles of a world that changed during a tick & turns them into as few update
+# packets as possible on flush: each tile is only sent once (with its state at flush time, however
+# many times it changed) and tiles are batched into SEND_TILE_UPDATE_DATA_MULTIPLE packets of up to
+# max_packet_size bytes. A batch of one goes out as a plain SEND_TILE_UPDATE_DATA.
+class TileUpdateCoalescer:
+    __slots__ = ("world", "max_packet_size", "metrics", "_pending")
+
+    def __init__(self, world: World, *, max_packet_size: int = 4096) -> None:
+        self.world: World = world
+        self.max_packet_size: int = max_packet_size
+        self.metrics: TileUpdateMetrics = TileUpdateMetrics()
+
+        # index -> (x, y) & the number of times it changed, in the order they first changed
+        self._pending: Dict[int, Tuple[int, int, int]] = {}
+
+    def update(self, x: int, y: int) -> None:
+        index = self.world.index(x, y)
+        changes = self._pending[index][2] if index in self._pending else 0
+
+        self._pending[index] = (x, y, changes + 1)
+
+    def flush(self) -> List[UpdatePacket]:
+        packets = []
+        batch = []  # (x, y, tile data)
+        batch_size = TILE_UPDATE_OVERHEAD
+
+        for x, y, changes in self._pending.values():
+            data = self.world.tile_bytes(x, y)
+            size = TILE_UPDATE_POSITION.size + len(data)
+
+            self.metrics.updates += changes
+            self.metrics.unbatched_packets += changes
+            self.metrics.unbatched_bytes += changes * (TILE_UPDATE_OVERHEAD + len(data))
+
+            if batch and batch_size + size > self.max_packet_size:
+                packets.append(self._packet(batch))
+                batch, batch_size = [], TILE_UPDATE_OVERHEAD
+
+            batch.append((x, y, data))
+            batch_size += size
+
+        if batch:
+            packets.append(self._packet(batch))
+
+        self._pending.clear()
+
+        self.metrics.packets += len(packets)
+        self.metrics.packet_bytes += sum(packet.packed_size for packet in packets)
+
+        return packets
+
+    def _packet(self, batch: List[Tuple[int, int, bytes]]) -> UpdatePacket:
+        self.metrics.tiles += len(batch)
+
+        if len(batch) == 1:
+            x, y, data = batch[0]
+
+            return UpdatePacket(
+                update_type=UpdateType.SEND_TILE_UPDATE_DATA,
+                flags=UpdateFlags.EXTRA_DATA,
+                int_x=x,
+                int_y=y,
+                extra_data=data,
+            )
+
+        parts = []
+
+        for x, y, data in batch:
+            parts += (TILE_UPDATE_POSITION.pack(x, y), data)
+
+        return UpdatePacket(
+            update_type=UpdateType.SEND_TILE_UPDATE_DATA_MULTIPLE,
+            flags=UpdateFlags.EXTRA_DATA,
+            int_=len(batch),
+            extra_data=b"".join(parts),
+        )
+
+    def __len__(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,451 @@
+__all__ = ("World",)
+
+import re
+from array import array
+from collections import (
+    Counter,
+)
+from itertools import chain
+from struct import Struct
+from sys import byteorder
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from growtopia.net import (
+    UpdateFlags,
+    UpdatePacket,
+    UpdateType,
+)
+from growtopia.utils import (
+    Buffer,
+)
+
+from .enums import *
+from .item import Item
+from .items_data import (
+    ItemsData,
+)
+
+LATEST_WORLD_VERSION = 0x14
+
+WORLD_HEADER = Struct("<HI")  # version, flags (then the name)
+WORLD_SIZE = Struct("<III")  # width, height, tile count
+WORLD_RESERVED_SIZE = 5  # unknown, after the size & kept as is
+
+TILE_FIXED = Struct("<4H")  # foreground, background, parent, flags
+TILE_COLUMNS = 4
+TILE_FLAGS_OFFSET = 6
+TILE_U16 = Struct("<H")
+TILE_U32 = Struct("<I")
+
+TILE_EXTRA_DATA = int(TileFlags.EXTRA_DATA)
+TILE_LOCKED = int(TileFlags.LOCKED)
+
+# What follows the type byte of a tile's extra data. s: string (u16 length prefix), L: list of
+# u32s (u32 count prefix), x: bytes that are kept as they are, anything else a struct code.
+TILE_EXTRA_LAYOUTS: Dict[TileExtraType, str] = {
+    TileExtraType.DOOR: "sB",
+    TileExtraType.SIGN: "si",
+    TileExtraType.LOCK: "BIL8x",
+    TileExtraType.SEED: "IB",
+    TileExtraType.MAILBOX: "sssB",
+    TileExtraType.BULLETIN: "sssB",
+    TileExtraType.DICE: "B",
+    TileExtraType.PROVIDER: "I",
+    TileExtraType.ACHIEVEMENT: "IB",
+    TileExtraType.HEART_MONITOR: "Is",
+}
+
+TileExtraField = Tuple[str, int, Optional[Struct]]  # code, size (if fixed), struct (if a number)
+
+
+def _compile_extra_layout(layout: str) -> List[TileExtraField]:
+    extra_fields = []
+
+    for count, code in re.findall(r"(\d*)([a-zA-Z])", layout):
+        if code == "x":
+            extra_fields.append((code, int(count or 1), None))
+        elif code in "sL":
+            extra_fields.extend([(code, 0, None)] * int(count or 1))
+        else:
+            extra_fields.extend(
+                [(code, Struct("<" + code).size, Struct("<" + code))] * int(count or 1)
+            )
+
+    return extra_fields
+
+
+# Keyed by the plain ints, they're looked up for every tile with extra data.
+TILE_EXTRA_FIELDS: Dict[int, List[TileExtraField]] = {
+    int(extra_type): _compile_extra_layout(layout)
+    for extra_type, layout in TILE_EXTRA_LAYOUTS.items()
+}
+
+TileExtraValue = Union[int, str, bytes, Tuple[int, ...]]
+
+
+def _extra_fields(extra_type: int) -> List[TileExtraField]:
+    if (extra_fields := TILE_EXTRA_FIELDS.get(extra_type)) is None:
+        # The size of the extra data depends on its type, there's no telling where the tile ends.
+        raise ValueError(f"Unknown tile extra data type: {extra_type}")
+
+    return extra_fields
+
+
+def _extra_size(data: memoryview, offset: int) -> int:
+    # Size of the extra data at offset, type byte included.
+    end = offset + 1
+
+    for code, size, _ in _extra_fields(data[offset]):
+        if code == "s":
+            end += TILE_U16.size + TILE_U16.unpack_from(data, end)[0]
+        elif code == "L":
+            end += TILE_U32.size + TILE_U32.size * TILE_U32.unpack_from(data, end)[0]
+        else:
+            end += size
+
+    return end - offset
+
+
+def _decode_extra(data: memoryview) -> Tuple[TileExtraType, List[TileExtraValue]]:
+    values = []
+    offset = 1
+
+    for code, size, value_struct in _extra_fields(data[0]):
+        if code == "s":
+            size = TILE_U16.unpack_from(data, offset)[0]
+            offset += TILE_U16.size
+            values.append(str(data[offset : offset + size], "utf-8"))
+        elif code == "L":
+            size = TILE_U32.size * TILE_U32.unpack_from(data, offset)[0]
+            offset += TILE_U32.size
+            values.append(tuple(array("I", bytes(data[offset : offset + size]))))
+        elif code == "x":
+            values.append(bytes(data[offset : offset + size]))
+        else:
+            values.append(value_struct.unpack_from(data, offset)[0])
+
+        offset += size
+
+    return TileExtraType(data[0]), values
+
+
+def _encode_extra(extra_type: TileExtraType, values: Sequence[TileExtraValue]) -> bytes:
+    extra_fields = _extra_fields(int(extra_type))
+
+    if len(values) != len(extra_fields):
+        raise ValueError(f"{extra_type!r} takes {len(extra_fields)} values ({len(values)} given)")
+
+    parts = [bytes((extra_type,))]
+
+    for (code, size, value_struct), value in zip(extra_fields, values):
+        if code == "s":
+            data = value.encode()
+            parts += (TILE_U16.pack(len(data)), data)
+        elif code == "L":
+            parts += (TILE_U32.pack(len(value)), array("I", value).tobytes())
+        elif code == "x":
+            if len(value) != size:
+                raise ValueError(f"Expected {size} bytes for {extra_type!r}, got {len(value)}")
+
+            parts.append(bytes(value))
+        else:
+            parts.append(value_struct.pack(value))
+
+    return b"".join(parts)
+
+
+# The tiles of a world (SEND_MAP_DATA) as columns: foreground, background, parent & flags arrays
+# indexed by y * width + x, plus the lock indices & extra data of the few tiles that have them.
+# Loading only walks the tiles to find where each one starts (and keeps their extra data as views
+# into the source), the columns are decoded from there in one go when first used. Whatever
+# follows the tiles (dropped items, weather, ...) is kept as it is.
+class World:
+    __slots__ = (
+        "version",
+        "flags",
+        "name",
+        "width",
+        "height",
+        "_reserved",
+        "_source",
+        "_tile_count",
+        "_runs",
+        "_columns",
+        "_lock_indices",
+        "_extra",
+        "_edited",
+        "_tail",
+    )
+
+    @staticmethod
+    def load(buffer: Buffer) -> "World":
+        version, flags = buffer.read_struct(WORLD_HEADER)
+        name = buffer.read_str(buffer.read_int(2))
+        width, height, tile_count = buffer.read_struct(WORLD_SIZE)
+
+        world = World(name, version=version, flags=flags)
+        world.width, world.height = width, height
+        world._reserved = bytes(buffer.read_view(WORLD_RESERVED_SIZE))
+        world._index(buffer, tile_count)
+
+        return world
+
+    @staticmethod
+    def from_packet(packet: UpdatePacket) -> "World":
+        return World.load(Buffer(packet.extra_data))
+
+    def __init__(
+        self,
+        name: str = "",
+        width: int = 0,
+        height: int = 0,
+        *,
+        version: int = LATEST_WORLD_VERSION,
+        flags: int = 0,
+    ) -> None:
+        self.version: int = version
+        self.flags: int = flags
+        self.name: str = name
+        self.width: int = width
+        self.height: int = height
+
+        self._reserved: bytes = bytes(WORLD_RESERVED_SIZE)
+        self._tail: Union[bytes, memoryview] = b""
+
+        # Loaded: the source & where the fixed parts of the tiles are in it, in runs of tiles
+        # without a lock index or extra data (the fixed parts are back to back there).
+        self._source: Optional[memoryview] = None
+        self._tile_count: int = 0
+        self._runs: List[Tuple[int, int]] = []
+
+        # foreground, background, parents, flags
+        self._columns: Optional[Tuple[array, array, array, array]] = None
+
+        if width and height:
+            self._columns = tuple(
+                array("H", bytes(2 * width * height)) for _ in range(TILE_COLUMNS)
+            )
+
+        self._lock_indices: Dict[int, int] = {}
+        self._extra: Dict[int, Union[bytes, memoryview]] = {}  # encoded, type byte included
+        self._edited: bool = False  # lock indices / extra data set since loading
+
+    def _index(self, buffer: Buffer, tile_count: int) -> None:
+        view = buffer.view
+        offset = run_start = buffer.offset
+        runs = []
+
+        for index in range(tile_count):
+            tile_flags = TILE_U16.unpack_from(view, offset + TILE_FLAGS_OFFSET)[0]
+            offset += TILE_FIXED.size
+
+            if tile_flags & (TILE_LOCKED | TILE_EXTRA_DATA):
+                runs.append((run_start, offset))
+
+            if tile_flags & TILE_LOCKED:
+                self._lock_indices[index] = TILE_U16.unpack_from(view, offset)[0]
+                offset += TILE_U16.size
+
+            if tile_flags & TILE_EXTRA_DATA:
+                size = _extra_size(view, offset)
+                self._extra[index] = view[offset : offset + size]
+                offset += size
+
+            if tile_flags & (TILE_LOCKED | TILE_EXTRA_DATA):
+                run_start = offset
+
+        runs.append((run_start, offset))
+
+        if offset > len(view):
+            raise ValueError(f"Tiles run past the end of the data ({offset} > {len(view)})")
+
+        self._source = view
+        self._tile_count = tile_count
+        self._runs = runs
+        self._columns = None
+        self._tail = view[offset:]
+
+        buffer.skip(len(view) - buffer.offset)
+
+    def _decode_columns(self) -> Tuple[array, array, array, array]:
+        fixed = array("H")
+        fixed.frombytes(b"".join(self._source[start:end] for start, end in self._runs))
+
+        if byteorder == "big":
+            fixed.byteswap()
+
+        return tuple(fixed[column::TILE_COLUMNS] for column in range(TILE_COLUMNS))
+
+    @property
+    def columns(self) -> Tuple[array, array, array, array]:
+        if self._columns is None:
+            self._columns = self._decode_columns()
+
+        return self._columns
+
+    @property
+    def foreground(self) -> array:
+        return self.columns[0]
+
+    @property
+    def background(self) -> array:
+        return self.columns[1]
+
+    @property
+    def parents(self) -> array:
+        return self.columns[2]
+
+    @property
+    def tile_flags(self) -> array:
+        return self.columns[3]
+
+    def index(self, x: int, y: int) -> int:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"({x}, {y}) is outside of the world ({self.width}x{self.height})")
+
+        return y * self.width + x
+
+    def lock_index(self, x: int, y: int) -> Optional[int]:
+        return self._lock_indices.get(self.index(x, y))
+
+    def set_lock_index(self, x: int, y: int, lock_index: Optional[int]) -> None:
+        index = self.index(x, y)
+
+        if lock_index is None:
+            self._lock_indices.pop(index, None)
+            self.tile_flags[index] &= ~TILE_LOCKED
+        else:
+            self._lock_indices[index] = lock_index
+            self.tile_flags[index] |= TILE_LOCKED
+
+        self._edited = True
+
+    def extra(self, x: int, y: int) -> Optional[Tuple[TileExtraType, List[TileExtraValue]]]:
+        if (data := self._extra.get(self.index(x, y))) is None:
+            return None
+
+        return _decode_extra(memoryview(data))
+
+    def set_extra(
+        self,
+        x: int,
+        y: int,
+        extra_type: Optional[TileExtraType],
+        values: Sequence[TileExtraValue] = (),
+    ) -> None:
+        index = self.index(x, y)
+
+        if extra_type is None:
+            self._extra.pop(index, None)
+            self.tile_flags[index] &= ~TILE_EXTRA_DATA
+        else:
+            self._extra[index] = _encode_extra(extra_type, values)
+            self.tile_flags[index] |= TILE_EXTRA_DATA
+
+        self._edited = True
+
+    def item_counts(self) -> Counter:
+        # How many tiles there are of each item, foreground & background (blanks aren't counted).
+        counts = Counter(chain(self.foreground, self.background))
+        counts.pop(0, None)
+
+        return counts
+
+    def items(self, items_data: ItemsData) -> Dict[int, Item]:
+        return {
+            item_id: items_data[item_id]
+            for item_id in self.item_counts()
+            if item_id < len(items_data)
+        }
+
+    def missing_items(self, items_data: ItemsData) -> List[int]:
+        # Ids of the items in the world that items_data doesn't have (e.g. it's outdated).
+        return sorted(item_id for item_id in self.item_counts() if item_id >= len(items_data))
+
+    def foreground_item(self, x: int, y: int, items_data: ItemsData) -> Item:
+        return items_data[self.foreground[self.index(x, y)]]
+
+    def background_item(self, x: int, y: int, items_data: ItemsData) -> Item:
+        return items_data[self.background[self.index(x, y)]]
+
+    def _tile_parts(self) -> List[Union[bytes, memoryview]]:
+        # Untouched tiles are copied over as they are.
+        if self._source is not None and not self._edited:
+            if self._columns is None or self._columns == self._decode_columns():
+                return [self._source[self._runs[0][0] : self._runs[-1][1]]]
+
+        foreground, background, parents, tile_flags = self.columns
+        parts = []
+
+        for index in range(len(self)):
+            flags = tile_flags[index]
+            parts.append(
+                TILE_FIXED.pack(foreground[index], background[index], parents[index], flags)
+            )
+
+            if flags & TILE_LOCKED:
+                parts.append(TILE_U16.pack(self._lock_indices[index]))
+
+            if flags & TILE_EXTRA_DATA:
+                parts.append(self._extra[index])
+
+        return parts
+
+    def tile_bytes(self, x: int, y: int) -> bytes:
+        # A single tile as it's written in the world (and in tile update packets).
+        index = self.index(x, y)
+        foreground, background, parents, tile_flags = self.columns
+        flags = tile_flags[index]
+
+        data = TILE_FIXED.pack(foreground[index], background[index], parents[index], flags)
+
+        if flags & TILE_LOCKED:
+            data += TILE_U16.pack(self._lock_indices[index])
+
+        if flags & TILE_EXTRA_DATA:
+            data += self._extra[index]
+
+        return data
+
+    def to_bytes(self, *, buffer: Optional[Buffer] = None) -> Buffer:
+        name = self.name.encode()
+        parts = [
+            WORLD_HEADER.pack(self.version, self.flags),
+            TILE_U16.pack(len(name)),
+            name,
+            WORLD_SIZE.pack(self.width, self.height, len(self)),
+            self._reserved,
+            *self._tile_parts(),
+            self._tail,
+        ]
+
+        if buffer is None:
+            buffer = Buffer(bytearray().join(parts))
+            buffer.skip(len(buffer))
+        else:
+            buffer.write_many(parts)
+
+        return buffer
+
+    def to_update_packet(self) -> UpdatePacket:
+        return UpdatePacket(
+            update_type=UpdateType.SEND_MAP_DATA,
+            flags=UpdateFlags.EXTRA_DATA,
+            extra_data=bytes(self.to_bytes().data),
+        )
+
+    def __str__(self) -> str:
+        return f"<World: name={self.name}, size={self.width}x{self.height}, version={self.version}>"
+
+    def __len__(self) -> int:
+        if self._columns is not None:
+            return len(self._columns[0])
+
+        return self._tile_count
@@ -1,35 +1,96 @@
-__all__ = ("Buffer",)
+__all__ = ("Buffer", "BufferPool", "BUFFER_POOL")
 
 import struct
+from contextlib import (
+    contextmanager,
+)
+from mmap import ACCESS_READ
+from mmap import (
+    mmap as MemoryMap,
+)
+from os import fstat
+from struct import Struct
 from typing import (
+    Dict,
+    Iterator,
+    List,
     Literal,
     Optional,
+    Sequence,
+    Tuple,
     Union,
 )
 
 from .compression import (
+    Z_BEST_COMPRESSION,
     CompressionType,
     zlib_compress,
     zlib_decompress,
 )
 from .crypto import hash_data
 
+# Precompiled for the usual int sizes, anything else goes through int.from_bytes.
+BUFFER_INT_STRUCTS: Dict[Tuple[int, str], Struct] = {
+    (size, byteorder): Struct(("<" if byteorder == "little" else ">") + code)
+    for size, code in ((1, "B"), (2, "H"), (4, "I"), (8, "Q"))
+    for byteorder in ("little", "big")
+}
+
 
 class Buffer:
-    __slots__ = ("__data", "__offset")
+    __slots__ = ("__data", "__offset", "__view", "__reserved")
 
     @staticmethod
-    def load(path_or_data: Union[str, bytearray]) -> "Buffer":
+    def load(path_or_data: Union[str, bytearray], *, mmap: bool = False) -> "Buffer":
         if isinstance(path_or_data, str):
             with open(path_or_data, "rb") as f:
+                # Read-only & shared between every process mapping the same file, nothing gets
+                # copied onto the heap until it's actually read. (Empty files can't be mapped.)
+                if mmap and fstat(f.fileno()).st_size:
+                    return Buffer(MemoryMap(f.fileno(), 0, access=ACCESS_READ))
+
                 return Buffer(bytearray(f.read()))
 
         return Buffer(path_or_data)
 
-    def __init__(self, data: Optional[bytearray] = None) -> None:
-        self.__data: bytearray = data or bytearray()
+    def __init__(self, data: Optional[Union[bytearray, MemoryMap]] = None) -> None:
+        self.__data: Union[bytearray, MemoryMap] = data or bytearray()
         self.__offset: int = 0
 
+        # Read-only view of the data, made on first use. Exporting a view stops a bytearray from
+        # being resized (or a map from being closed), so it's let go of before that happens.
+        self.__view: Optional[memoryview] = None
+
+        # Room made for upcoming writes (see reserve): zeroed or stale bytes at the end of __data
+        # that aren't part of the buffer. Dropped as soon as the data as a whole is needed (data,
+        # view), so there's never any while a view exists.
+        self.__reserved: int = 0
+
+    def _set_data(self, data: Union[bytearray, MemoryMap]) -> None:
+        self.__view = None
+        self.__reserved = 0
+        self.__data = data
+
+    def reserve(self, size: int) -> None:
+        # Makes sure the next size bytes written (at the end, like write does) fit without the data
+        # having to grow, the typed writes then pack straight into it.
+        if (missing := size - self.__reserved) > 0:
+            self.__view = None
+            self.__data.extend(bytes(missing))
+            self.__reserved = size
+
+    def clear(self) -> None:
+        # Empty again, but with all of its memory kept as reserved room. What BufferPool reuses.
+        self.__view = None
+        self.__offset = 0
+        self.__reserved = len(self.__data)
+
+    def close(self) -> None:
+        self.__view = None
+
+        if self.is_mapped:
+            self.__data.close()
+
     def save_to_file(self, path: str) -> None:
         with open(path, "wb") as f:
             f.write(self.data)
@@ -37,15 +98,15 @@ class Buffer:
     def hash(self) -> int:
         return hash_data(self.data)
 
-    def compress(self, compression_type: CompressionType) -> None:
+    def compress(self, compression_type: CompressionType, level: int = Z_BEST_COMPRESSION) -> None:
         if compression_type == CompressionType.ZLIB:
-            self.__data = zlib_compress(self.view)
+            self._set_data(zlib_compress(self.view, level))
         else:
             raise ValueError(f"Unknown compression type: {compression_type}")
 
     def decompress(self, compression_type: CompressionType) -> None:
         if compression_type == CompressionType.ZLIB:
-            self.__data = zlib_decompress(self.view)
+            self._set_data(zlib_decompress(self.view))
         else:
             raise ValueError(f"Unknown compression type: {compression_type}")
 
@@ -56,7 +117,7 @@ class Buffer:
         self.__offset = 0
 
     def read(self, size: int) -> bytearray:
-        val = self.__data[self.offset : self.offset + size]
+        val = self.data[self.offset : self.offset + size]
         self.skip(size)
 
         return val
@@ -68,6 +129,18 @@ class Buffer:
         return val
 
     def read_int(self, int_size: int = 4, byteorder: Literal["little", "big"] = "little") -> int:
+        int_struct = BUFFER_INT_STRUCTS.get((int_size, byteorder))
+
+        # Past the end (or into reserved room) it reads whatever's left, like int.from_bytes does.
+        if (
+            int_struct is not None
+            and self.__offset + int_size <= len(self.__data) - self.__reserved
+        ):
+            value = int_struct.unpack_from(self.__data, self.__offset)[0]
+            self.__offset += int_size
+
+            return value
+
         return int.from_bytes(self.read_view(int_size), byteorder=byteorder)
 
     def read_float(
@@ -75,18 +148,94 @@ class Buffer:
         float_size: int = 4,
         fmt: Union[str, bytes] = "f",
     ) -> float:
-        return struct.unpack(fmt, self.read(float_size))[0]
+        value = struct.unpack_from(fmt, self.data, self.__offset)[0]
+        self.skip(float_size)
+
+        return value
 
     def read_str(self, str_size: int, encoding: str = "utf-8") -> str:
-        return self.read(str_size).decode(encoding)
+        return str(self.read_view(str_size), encoding)
+
+    def read_struct(self, fmt: Union[str, Struct]) -> tuple:
+        # Several fields in one go, e.g. read_struct("<IHH") or with a precompiled Struct.
+        if isinstance(fmt, Struct):
+            values = fmt.unpack_from(self.data, self.__offset)
+            self.skip(fmt.size)
+        else:
+            values = struct.unpack_from(fmt, self.data, self.__offset)
+            self.skip(struct.calcsize(fmt))
+
+        return values
+
+    def read_many(self, fmt: Union[str, Struct], count: int) -> List[tuple]:
+        # count records of the same layout, one after another.
+        record = fmt if isinstance(fmt, Struct) else Struct(fmt)
+        values = list(record.iter_unpack(self.read_view(record.size * count)))
+
+        if len(values) != count:
+            raise struct.error(f"read_many requires a buffer of {record.size * count} bytes")
+
+        return values
+
+    def _pack_into(self, fmt: Union[str, Struct], size: int, *values) -> bool:
+        # Packs into reserved room if there's enough of it, False if there isn't (or the values
+        # don't fit the format, left for the regular write path to raise about).
+        if size > self.__reserved:
+            return False
+
+        try:
+            if isinstance(fmt, Struct):
+                fmt.pack_into(self.__data, len(self.__data) - self.__reserved, *values)
+            else:
+                struct.pack_into(fmt, self.__data, len(self.__data) - self.__reserved, *values)
+        except struct.error:
+            return False
+
+        self.__reserved -= size
+        self.skip(size)
+
+        return True
 
     def write(self, data: Union[bytes, bytearray]) -> None:
-        self.__data.extend(data)
-        self.skip(len(data))
+        self.__view = None
+        size = len(data)
+
+        if not self.__reserved:
+            self.__data.extend(data)
+        elif size <= self.__reserved:
+            end = len(self.__data) - self.__reserved
+            self.__data[end : end + size] = data
+            self.__reserved -= size
+        else:
+            self.__data[len(self.__data) - self.__reserved :] = data
+            self.__reserved = 0
+
+        self.__offset += size
+
+    def write_many(self, parts: Sequence[Union[bytes, bytearray, memoryview]]) -> None:
+        # Same as writing each of them in turn, but room for all of them is made first & they're
+        # copied straight into it.
+        size = sum(map(len, parts))
+        self.reserve(size)
+        self.__view = None
+
+        end = len(self.__data) - self.__reserved
+
+        with memoryview(self.__data) as view:
+            for part in parts:
+                view[end : end + len(part)] = part
+                end += len(part)
+
+        self.__reserved -= size
+        self.__offset += size
 
     def write_int(
         self, value: int, int_size: int = 4, byteorder: Literal["little", "big"] = "little"
     ) -> None:
+        if (int_struct := BUFFER_INT_STRUCTS.get((int_size, byteorder))) is not None:
+            if self._pack_into(int_struct, int_size, value):
+                return
+
         self.write(value.to_bytes(int_size, byteorder=byteorder))
 
     def write_float(
@@ -94,22 +243,46 @@ class Buffer:
         value: float,
         fmt: Union[str, bytes] = "f",
     ) -> None:
-        self.write(struct.pack(fmt, value))
+        if not self._pack_into(fmt, struct.calcsize(fmt), value):
+            self.write(struct.pack(fmt, value))
 
     def write_str(self, value: str, encoding: str = "utf-8") -> None:
         self.write(value.encode(encoding))
 
+    def write_struct(self, fmt: Union[str, Struct], *values) -> None:
+        if isinstance(fmt, Struct):
+            if not self._pack_into(fmt, fmt.size, *values):
+                self.write(fmt.pack(*values))
+        elif not self._pack_into(fmt, struct.calcsize(fmt), *values):
+            self.write(struct.pack(fmt, *values))
+
     @property
     def offset(self) -> int:
         return self.__offset
 
     @property
     def data(self) -> bytearray:
+        if self.__reserved:
+            del self.__data[len(self.__data) - self.__reserved :]
+            self.__reserved = 0
+
         return self.__data
 
+    @property
+    def capacity(self) -> int:
+        # Size of the data including any reserved room.
+        return len(self.__data)
+
+    @property
+    def is_mapped(self) -> bool:
+        return isinstance(self.__data, MemoryMap)
+
     @property
     def view(self) -> memoryview:
-        return memoryview(self.__data).toreadonly()
+        if self.__view is None:
+            self.__view = memoryview(self.data).toreadonly()
+
+        return self.__view
 
     @property
     def size(self) -> int:
@@ -121,10 +294,57 @@ class Buffer:
 
     @property
     def data_at_offset(self) -> bytearray:
-        return self.__data[self.__offset :]
+        return self.data[self.__offset :]
+
+    @property
+    def view_at_offset(self) -> memoryview:
+        # data_at_offset without the copy.
+        return self.view[self.__offset :]
 
     def __bool__(self) -> bool:
-        return bool(self.data)
+        return len(self) > 0
 
     def __len__(self) -> int:
-        return len(self.data)
+        return len(self.__data) - self.__reserved
+
+
+# Buffers to write into & hand back when done, so that serialising over & over (packets, items
+# data) reuses the same few allocations instead of growing new bytearrays each time. A buffer's
+# data is only valid until it's released, copy whatever has to outlive it.
+class BufferPool:
+    __slots__ = ("max_buffers", "max_capacity", "_buffers")
+
+    def __init__(self, max_buffers: int = 16, max_capacity: int = 1 << 24) -> None:
+        self.max_buffers: int = max_buffers
+        self.max_capacity: int = max_capacity  # bigger ones aren't kept
+
+        self._buffers: List[Buffer] = []
+
+    def acquire(self, size_hint: int = 0) -> Buffer:
+        buffer = self._buffers.pop() if self._buffers else Buffer()
+        buffer.reserve(size_hint)
+
+        return buffer
+
+    def release(self, buffer: Buffer) -> None:
+        if buffer.is_mapped or buffer.capacity > self.max_capacity:
+            return
+
+        if len(self._buffers) < self.max_buffers:
+            buffer.clear()
+            self._buffers.append(buffer)
+
+    @contextmanager
+    def buffer(self, size_hint: int = 0) -> Iterator[Buffer]:
+        buffer = self.acquire(size_hint)
+
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+
+BUFFER_POOL: BufferPool = BufferPool()
@@ -1,4 +1,4 @@
-__all__ = ("zlib_compress", "zlib_decompress", "CompressionType")
+__all__ = ("zlib_compress", "zlib_decompress", "CompressionType", "Z_BEST_COMPRESSION")
 
 from enum import Enum
 from typing import Union
@@ -1,27 +1,110 @@
 __all__ = (
     "xor_cipher",
+    "xor_cipher_many",
     "hash_data",
+    "hash_file",
+    "Hasher",
 )
 
+from itertools import (
+    accumulate,
+    pairwise,
+)
+from operator import xor
+from typing import (
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+XOR_CIPHER_KEY: bytes = b"PBG892FXX982ABC*"
+
+# The key stream for every starting key, long enough for any item name (longer ones repeat it).
+XOR_CIPHER_STREAMS: Tuple[bytes, ...] = tuple(
+    (XOR_CIPHER_KEY[key:] + XOR_CIPHER_KEY[:key]) * 16 for key in range(len(XOR_CIPHER_KEY))
+)
+
+
+def _xor_key_stream(key: int, size: int) -> bytes:
+    stream = XOR_CIPHER_STREAMS[key % len(XOR_CIPHER_KEY)]
+
+    if size > len(stream):
+        stream *= -(-size // len(stream))
+
+    return stream[:size]
+
+
+def _xor_ascii(string: str, stream: bytes) -> str:
+    # The whole string is xor'd as one big int. Only valid for ascii, where characters & bytes are
+    # the same thing (and the key being ascii as well, the result stays ascii).
+    size = len(string)
+    data = int.from_bytes(string.encode("ascii"), "little") ^ int.from_bytes(stream, "little")
+
+    return data.to_bytes(size, "little").decode("ascii")
+
 
 def xor_cipher(string: str, key: int) -> str:
-    key %= (key_len := len("*PBG892FXX982ABC"))
-    result = ""
+    stream = _xor_key_stream(key, len(string))
+
+    if string.isascii():
+        return _xor_ascii(string, stream)
+
+    return "".join(map(chr, map(xor, map(ord, string), stream)))
+
+
+def xor_cipher_many(strings: Sequence[str], keys: Sequence[int]) -> List[str]:
+    # Same as [xor_cipher(s, k) for s, k in zip(strings, keys)], but done in one pass over all of
+    # the strings joined together.
+    joined = "".join(strings)
+
+    if not joined.isascii():
+        return list(map(xor_cipher, strings, keys))
+
+    lengths = list(map(len, strings))
+    result = _xor_ascii(joined, b"".join(map(_xor_key_stream, keys, lengths)))
+
+    return [result[start:stop] for start, stop in pairwise(accumulate(lengths, initial=0))]
+
+
+# Incremental version of hash_data, for hashing files & downloads chunk by chunk. It's the same
+# per-byte loop hash_data always was & just as fast (about 0.2s/MB), only split across updates.
+# Each step (rotl5 + byte, mod 2^32) depends on the carry of the one before it, so there's no
+# closed form to skip ahead with. (Working mod 2^32 - 1, where the rotation is a multiply by 32, is
+# only off when an addition carries out of 32 bits, and which steps do can't be known without
+# running them.)
+class Hasher:
+    __slots__ = ("result", "size")
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview] = b"") -> None:
+        self.result: int = 0x55555555
+        self.size: int = 0
+
+        if data:
+            self.update(data)
+
+    def update(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        result = self.result
+
+        for i in data:
+            result = ((result << 5) + (result >> 27) + i) & 0xFFFFFFFF
+
+        self.result = result
+        self.size += len(data)
 
-    for i in string:
-        result += chr(ord(i) ^ ord("PBG892FXX982ABC*"[key]))
-        key += 1
+    def digest(self) -> int:
+        return self.result
 
-        if key >= key_len:
-            key = 0
 
-    return result
+def hash_data(data: Union[bytes, bytearray, memoryview]) -> int:
+    return Hasher(data).digest()
 
 
-def hash_data(data: bytearray) -> int:
-    result = 0x55555555
+def hash_file(path: str, chunk_size: int = 1 << 20) -> int:
+    hasher = Hasher()
 
-    for i in data:
-        result = (result >> 27) + (result << 5) + i & 0xFFFFFFFF
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
 
-    return result
+    return hasher.digest()
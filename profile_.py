@@ -0,0 +1,170 @@
+import tracemalloc
+from dataclasses import (
+    dataclass,
+    field,
+    fields,
+    is_dataclass,
+)
+from os import cpu_count, path
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+)
+
+from growtopia import (
+    LOG_LEVEL_ERROR,
+    BufferPool,
+    Item,
+    ItemPetInfo,
+    ItemPunchOption,
+    ItemsData,
+    ItemSeedInfo,
+    ItemSitInfo,
+    UpdateFlags,
+    UpdatePacket,
+    logger,
+)
+
+ITEMS_DATA_PATH = "tests/data/items.dat"
+
+
+def timeit(func: Callable, runs: int = 3) -> float:
+    best = float("inf")
+
+    for _ in range(runs):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+
+    return best
+
+
+def traced(func: Callable) -> int:
+    tracemalloc.start()
+
+    try:
+        result = func()  # kept alive until it's measured
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+# The same dataclass without __slots__, i.e. how the item classes used to be.
+def unslotted(cls: type) -> type:
+    namespace: Dict[str, Any] = {"__annotations__": {}}
+
+    for cls_field in fields(cls):
+        namespace["__annotations__"][cls_field.name] = cls_field.type
+
+        if not cls_field.init:
+            namespace[cls_field.name] = field(default=cls_field.default, init=False)
+
+    return dataclass(type(cls.__name__, (), namespace))
+
+
+def rebuild(value: Any, classes: Dict[type, type]) -> Any:
+    if isinstance(value, list):
+        return [rebuild(i, classes) for i in value]
+    elif not is_dataclass(value):
+        return value
+
+    return classes[type(value)](
+        **{f.name: rebuild(getattr(value, f.name), classes) for f in fields(value) if f.init}
+    )
+
+
+def profile_items_data_memory() -> None:
+    items = ItemsData.load(ITEMS_DATA_PATH).items
+    item_classes = (Item, ItemPetInfo, ItemPunchOption, ItemSeedInfo, ItemSitInfo)
+
+    # Both copies share every attribute value (strings, enums, ...) with items, only the objects
+    # themselves (& their __dict__s) are allocated, that's the difference between the two.
+    slotted_size = traced(lambda: rebuild(items, {cls: cls for cls in item_classes}))
+    unslotted_size = traced(lambda: rebuild(items, {cls: unslotted(cls) for cls in item_classes}))
+    table_size = traced(lambda: ItemsData.load(ITEMS_DATA_PATH).items)
+
+    print(
+        f"Item objects ({len(items)} items): {slotted_size / 1e6:.1f}MB slotted,"
+        f" {unslotted_size / 1e6:.1f}MB with __dict__ ({unslotted_size / slotted_size:.2f}x)"
+    )
+    print(
+        f"Whole table: {table_size / 1e6:.1f}MB"
+        f" ({table_size / path.getsize(ITEMS_DATA_PATH):.1f}x the file size)"
+    )
+
+
+def traced_peak(func: Callable, runs: int = 10) -> int:
+    tracemalloc.start()
+
+    try:
+        for _ in range(runs):
+            func()
+
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def profile_items_data_serialise() -> None:
+    items_data = ItemsData.load(ITEMS_DATA_PATH)
+    pool = BufferPool()
+
+    def pooled() -> None:
+        with pool.buffer() as buffer:
+            items_data.to_bytes(buffer=buffer)
+
+    for name, func in (("new buffer", items_data.to_bytes), ("pooled buffer", pooled)):
+        func()  # warm up (item encodings, the pool)
+
+        print(
+            f"ItemsData.to_bytes ({name}): {timeit(func) * 1000:.1f}ms,"
+            f" peak {traced_peak(func) / 1e6:.2f}MB over 10 runs"
+        )
+
+
+def profile_update_packet() -> None:
+    packets = [
+        UpdatePacket(net_id=i, flags=UpdateFlags.EXTRA_DATA, vec_x=i * 32.0, extra_data=b"data")
+        for i in range(10000)
+    ]
+    chunks = [packet.to_bytes() for packet in packets]
+    pool = BufferPool()
+
+    def pack_into() -> None:
+        with pool.buffer() as buffer:
+            for packet in packets:
+                packet.pack_into(buffer)
+
+    for name, func in (
+        ("pack (packer)", lambda: [packet.pack() for packet in packets]),
+        ("to_bytes", lambda: [packet.to_bytes() for packet in packets]),
+        ("pack_into (pooled buffer)", pack_into),
+        ("pack_many", lambda: UpdatePacket.pack_many(packets)),
+        ("unpack (packer)", lambda: [UpdatePacket().unpack(bytearray(chunk)) for chunk in chunks]),
+        ("unpack_from", lambda: [UpdatePacket.unpack_from(chunk) for chunk in chunks]),
+        ("unpack_many", lambda: list(UpdatePacket.unpack_many(b"".join(chunks)))),
+    ):
+        print(f"UpdatePacket {name} (10k packets): {timeit(func) * 1000:.1f}ms")
+
+
+def profile_items_data_load() -> None:
+    sequential = timeit(lambda: ItemsData.load(ITEMS_DATA_PATH))
+    print(f"ItemsData.load: {sequential * 1000:.1f}ms")
+
+    for workers in sorted({2, 4, cpu_count() or 1}):
+        parallel = timeit(lambda: ItemsData.load_parallel(ITEMS_DATA_PATH, workers=workers))
+        print(
+            f"ItemsData.load_parallel ({workers} workers): {parallel * 1000:.1f}ms"
+            f" ({sequential / parallel:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    logger.setLevel(LOG_LEVEL_ERROR)
+
+    profile_items_data_load()
+    profile_items_data_memory()
+    profile_items_data_serialise()
+    profile_update_packet()
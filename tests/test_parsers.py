@@ -1,10 +1,52 @@
-from asyncio import run
-from os import chdir, path
+import pickle
+from asyncio import (
+    Event,
+    run,
+    wait_for,
+)
+from concurrent.futures import (
+    ThreadPoolExecutor,
+)
+from io import BytesIO
+from os import (
+    chdir,
+    listdir,
+    path,
+    utime,
+)
 
 import pytest
 
 from growtopia import (
+    BUFFER_POOL,
+    Buffer,
+    Hasher,
+    Item,
+    ItemCategory,
+    ItemProperty,
+    ItemPunchOption,
+    ItemPunchOptions,
     ItemsData,
+    ItemsDataPatch,
+    ItemsDataReloader,
+    PacketType,
+    PlayerTributeData,
+    TileExtraType,
+    TileFlags,
+    TileUpdateCoalescer,
+    UpdatePacket,
+    UpdateType,
+    World,
+    hash_data,
+    hash_file,
+    xor_cipher,
+    xor_cipher_many,
+    zlib_decompress,
+)
+from growtopia.parsers.item_blob import (
+    ITEM_BLOBS,
+    ITEM_BLOBS_MAX,
+    _intern_blob,
 )
 
 chdir(path.abspath(path.dirname(__file__)))
@@ -23,5 +65,512 @@ async def test_items_data_parser():
     assert items_data[2].name.lower() == "dirt"
 
 
+def test_item_codec():
+    items = ItemsData.load("data/items.dat").items[:100]
+
+    for version in (17, 18):
+        buffer = Buffer()
+
+        for item in items:
+            item.to_bytes(buffer, version)
+
+        buffer.reset_offset()
+        decoded = [Item.from_bytes(buffer, version) for _ in items]
+
+        assert buffer.size_remaining == 0
+        assert [i.name for i in decoded] == [i.name for i in items]
+        assert [i.sit_info for i in decoded] == [i.sit_info for i in items]
+
+        if version == 18:
+            assert decoded == items
+
+    assert not hasattr(decoded[0], "__dict__")
+    assert not hasattr(decoded[0].sit_info, "__dict__")
+
+
+def test_items_data_dirty_tracking():
+    with open("data/items.dat", "rb") as f:
+        source = f.read()
+
+    items_data = ItemsData.load("data/items.dat")
+
+    assert not any(item.is_dirty for item in items_data)
+    assert items_data.to_bytes().data == source
+
+    assert isinstance(items_data[0]._encoded, memoryview)  # not a copy of the source
+
+    # Reading punch options (parsing them included) isn't a change.
+    assert any(list(item.punch_options) for item in items_data)
+    assert not any(item.is_dirty for item in items_data)
+    assert pickle.loads(pickle.dumps(items_data[0])) == items_data[0]
+
+    items_data[2].rarity = 7
+    items_data[3].seed_info.colour = 0
+    items_data[4].punch_options.add_punch_option(ItemPunchOption.hide_item())
+    items_data[5].pet_info.name = "Pet"
+
+    assert [i for i, item in enumerate(items_data) if item.is_dirty] == [2, 3, 4, 5]
+
+    reloaded = ItemsData.load(items_data.to_bytes().data)
+
+    assert reloaded[2].rarity == 7
+    assert reloaded[3].seed_info.colour == 0
+    assert str(reloaded[4].punch_options).endswith("RFA_HIDEITEM")
+    assert reloaded[5].pet_info.name == "Pet"
+    assert reloaded[6:] == items_data[6:]
+    assert not any(item.is_dirty for item in items_data)
+
+    sit_info = items_data[6].sit_info
+    items_data[7].sit_info = sit_info
+    sit_info.sit_overlay_x += 1
+
+    assert items_data[6].is_dirty and items_data[7].is_dirty
+
+
+def test_items_data_caller_bytes():
+    data = bytearray(Buffer.load("data/items.dat").data)
+    expected = bytes(data)
+
+    # Items keep views into the data, their items data's own copy of it rather than the caller's.
+    for items_data in (ItemsData.load(data), ItemsData.load(data, lazy=True)):
+        data[6:16] = bytes(10)  # into the first item
+        data += b"resized"
+
+        assert items_data.to_bytes().data == expected
+
+        del data[len(expected) :]
+        data[:] = expected
+
+
+def test_items_data_interning():
+    items_data = ItemsData.load("data/items.dat")
+    first, second = items_data[0], items_data[1]
+
+    codec = Item.get_codec(items_data.version)
+    assert codec.blobs["reserved"](first) is codec.blobs["reserved"](second)
+    assert first.renderer_file_path is second.renderer_file_path
+
+    # Copied on first access, edits in place only touch that item & mark it dirty.
+    reserved = first.reserved
+    assert reserved is first.reserved and not first.is_dirty
+
+    first.reserved[0] = 1
+    first.bodypart[0] = 1
+
+    assert first.is_dirty and not second.is_dirty
+    assert second.reserved[0] == 0
+    assert pickle.loads(pickle.dumps(first)).reserved[0] == 1
+
+    loaded = ItemsData.load(items_data.to_bytes().data)[0]
+    assert loaded.reserved[0] == 1 and loaded.bodypart[0] == 1
+
+    # The pool is bounded, values past it are left unshared.
+    blobs = ITEM_BLOBS.copy()
+
+    for i in range(ITEM_BLOBS_MAX):
+        _intern_blob(i.to_bytes(4, "little"))
+
+    assert len(ITEM_BLOBS) == ITEM_BLOBS_MAX
+
+    ITEM_BLOBS.clear()
+    ITEM_BLOBS.update(blobs)
+
+
+def test_punch_options():
+    punch_opts = ItemPunchOptions.from_str("op_params:1:2;UPDATEPUNCH")
+
+    assert str(punch_opts) == "op_params:1:2;UPDATEPUNCH"
+    assert punch_opts._options is None
+    assert punch_opts == ItemPunchOptions.from_str("op_params:1:2;UPDATEPUNCH")
+
+    punch_opts.add_punch_option(ItemPunchOption.hide_item())
+
+    assert [option.op for option in punch_opts] == ["op_params", "UPDATEPUNCH", "RFA_HIDEITEM"]
+    assert str(punch_opts) == "op_params:1,2;UPDATEPUNCH;RFA_HIDEITEM"
+
+    punch_opts.remove_punch_option(ItemPunchOption.update_punch())
+    assert str(punch_opts) == "op_params:1,2;RFA_HIDEITEM"
+    assert str(ItemPunchOptions([ItemPunchOption.update_punch()])) == "UPDATEPUNCH"
+
+
+def test_items_data_lazy():
+    with open("data/items.dat", "rb") as f:
+        source = f.read()
+
+    items_data = ItemsData.load("data/items.dat", lazy=True)
+
+    assert items_data.is_lazy
+    assert items_data.to_bytes().data == source
+    assert items_data[2].name.lower() == "dirt"
+    assert [item.id for item in items_data[-3:]] == [len(items_data) - i for i in (3, 2, 1)]
+
+    items_data[2].name = "Not Dirt"
+    assert ItemsData.load(items_data.to_bytes().data)[2].name == "Not Dirt"
+
+    assert len(items_data.items) == len(items_data)
+    assert not items_data.is_lazy
+
+
+def test_items_data_mmap():
+    items_data = ItemsData.load("data/items.dat", lazy=True, mmap=True)
+
+    assert items_data._source.is_mapped
+    assert items_data[2].name.lower() == "dirt"
+    assert items_data.items == ItemsData.load("data/items.dat").items
+
+
+def test_items_data_parallel():
+    items_data = ItemsData.load("data/items.dat")
+    parallel_items_data = ItemsData.load_parallel("data/items.dat", workers=2)
+
+    assert parallel_items_data.items == items_data.items
+    assert parallel_items_data.hash == items_data.hash
+
+    with ThreadPoolExecutor(2) as executor:
+        threaded = ItemsData.load_parallel("data/items.dat", workers=2, executor=executor)
+
+    assert threaded.items == items_data.items
+
+
+def test_items_table():
+    items_data = ItemsData.load("data/items.dat", lazy=True)
+    table = items_data.to_table()
+
+    assert len(table) == len(items_data)
+    assert list(table.with_property(ItemProperty.UNTRADEABLE)) == [
+        item.id for item in items_data if item.has_property(ItemProperty.UNTRADEABLE)
+    ]
+
+    # All of the flags for with_property (like where), any of them for with_any_property.
+    flags = ItemProperty.MOD | ItemProperty.UNTRADEABLE
+    all_of = [item.id for item in items_data if item.properties & flags == flags]
+    any_of = [item.id for item in items_data if item.properties & flags]
+
+    assert list(table.with_property(flags)) == list(table.where(properties=flags)) == all_of
+    assert list(table.with_any_property(flags)) == any_of
+    assert len(all_of) < len(any_of)
+    assert list(table.where(category=ItemCategory.SEED, rarity=(51, None))) == [
+        item.id
+        for item in items_data
+        if item.is_of_category(ItemCategory.SEED) and item.rarity > 50
+    ]
+    assert list(table.in_range("grow_time", 10, 100)) == [
+        item.id for item in items_data if 10 <= item.grow_time <= 100
+    ]
+
+
+def test_items_data_snapshot(tmp_path):
+    source_path = str(tmp_path / "items.dat")
+    cache_path = source_path + ".snapshot"
+
+    items_data = ItemsData.load("data/items.dat", lazy=True)
+    items_data.to_bytes().save_to_file(source_path)
+
+    cached = ItemsData.load_cached(source_path)
+    assert path.isfile(cache_path)
+    assert cached.hash == items_data.hash
+
+    cached = ItemsData.load_cached(source_path)
+    assert cached.is_lazy
+    assert cached.hash == items_data.hash
+    assert cached.to_bytes().data == items_data.to_bytes().data
+
+    items_data[2].name = "Not Dirt"
+    items_data.to_bytes().save_to_file(source_path)
+    utime(source_path, ns=(0, 0))
+
+    cached = ItemsData.load_cached(source_path)
+    assert cached[2].name == "Not Dirt"
+    assert ItemsData.load_snapshot(cache_path)[2].name == "Not Dirt"
+    assert sorted(listdir(tmp_path)) == ["items.dat", "items.dat.snapshot"]
+
+
+def test_items_data_snapshot_old_version(tmp_path):
+    source_path = str(tmp_path / "items.dat")
+    items = ItemsData.load("data/items.dat").items[:100]
+
+    buffer = Buffer()
+    buffer.write_int(17, 2)
+    buffer.write_int(len(items), 4)
+
+    for item in items:
+        item.to_bytes(buffer, 17)
+
+    buffer.save_to_file(source_path)
+    items_data = ItemsData.load(source_path)
+
+    for _ in range(2):  # saving the snapshot, then loading it
+        cached = ItemsData.load_cached(source_path)
+
+        assert cached.version == 17
+        assert [item.name for item in cached] == [item.name for item in items_data]
+        assert cached.to_bytes().data == items_data.to_bytes().data
+
+
+def test_items_data_hash():
+    items_data = ItemsData.load("data/items.dat")
+    data = Buffer.load("data/items.dat").data
+
+    hasher = Hasher()
+
+    for i in range(0, len(data), 4096):
+        hasher.update(data[i : i + 4096])
+
+    assert hasher.digest() == hash_data(data) == hash_file("data/items.dat")
+    assert hash_data(b"") == 0x55555555
+
+    assert items_data._hash is None
+    assert items_data.hash == hash_data(items_data.to_bytes().data)
+
+
+def test_xor_cipher():
+    items_data = ItemsData.load("data/items.dat")
+    names = [item.name for item in items_data]
+    ids = [item.id for item in items_data]
+
+    assert xor_cipher_many(xor_cipher_many(names, ids), ids) == names
+    assert xor_cipher_many(names, ids) == list(map(xor_cipher, names, ids))
+    assert xor_cipher("Dirt \u00e9", 2) == "\x03QKFf\u00b1"
+    assert xor_cipher(xor_cipher("D\u00efrt \U0001f642" * 10, 7), 7) == "D\u00efrt \U0001f642" * 10
+
+
+def test_items_data_iter_load():
+    items_data = ItemsData.load("data/items.dat")
+
+    assert list(ItemsData.iter_load("data/items.dat")) == items_data.items
+
+    compressed = items_data.to_bytes(compress=True).data
+    items = ItemsData.iter_load(BytesIO(compressed), compressed=True, chunk_size=777)
+
+    assert list(items) == items_data.items
+
+    with pytest.raises(ValueError):
+        list(ItemsData.iter_load(BytesIO(Buffer.load("data/items.dat").data[:-10])))
+
+
+def test_items_data_patch():
+    base = ItemsData.load("data/items.dat", lazy=True)
+    target = ItemsData.load("data/items.dat")
+
+    target[2].name = "Not Dirt"
+    target[3].rarity += 1
+    target.items = target.items[:-4]
+
+    patch = ItemsDataPatch.diff(base, target)
+
+    assert sorted(patch.changed) == [2, 3]
+    assert patch.removed == list(range(len(target), len(base)))
+    assert not patch.added
+
+    patch = ItemsDataPatch.load(patch.to_bytes(compress=True).data, compressed=True)
+    patched = patch.apply(base)
+
+    assert patched.hash == target.hash
+    assert patched.items == target.items
+
+    added = ItemsDataPatch.diff(patched, base)
+
+    assert added.added == patch.removed
+    assert added.apply(patched).to_bytes().data == base.to_bytes().data
+
+    with pytest.raises(ValueError):
+        patch.apply(patched)
+
+
+@pytest.mark.asyncio
+async def test_items_data_reloader(tmp_path):
+    path = str(tmp_path / "items.dat")
+    Buffer.load("data/items.dat").save_to_file(path)
+
+    reloader = ItemsDataReloader(path, interval=0.01)
+    items_data = reloader.items_data
+    reloaded = Event()
+    changes = []
+
+    def on_reload_failing(new_items_data, changed):
+        raise RuntimeError("callback failed")
+
+    def on_reload(new_items_data, changed):
+        changes.append(changed)
+        reloaded.set()
+
+    reloader.subscribe(on_reload_failing)  # shouldn't keep on_reload from being called
+    reloader.subscribe(on_reload)
+    reloader.start()
+
+    assert not await reloader.reload()
+
+    target = ItemsData.load(path)
+    target[2].name = "Not Dirt"
+    target.items = target.items[:-1]
+    target.to_bytes().save_to_file(path)
+    utime(path, ns=(0, 0))  # in case the mtime didn't move
+
+    await wait_for(reloaded.wait(), 30)
+    reloader.stop()
+
+    assert changes == [[2, items_data[-1].id]]  # item ids, the removed one's from the old data
+    assert reloader.items_data is not items_data
+    assert reloader.items_data[2].name == "Not Dirt"
+
+
+def test_items_data_update_packet():
+    items_data = ItemsData.load("data/items.dat")
+    size = items_data.estimate_size()
+
+    assert size == len(items_data.to_bytes())
+
+    while len(BUFFER_POOL):  # so that the packet's built in a new buffer
+        BUFFER_POOL.acquire()
+
+    payload = items_data.to_update_packet()
+
+    # Reserved at the estimated size & written into without growing.
+    with BUFFER_POOL.buffer() as buffer:
+        assert buffer.capacity == size
+
+    assert payload.readonly
+    assert items_data.to_update_packet().obj is payload.obj
+
+    packet = UpdatePacket()
+    packet.unpack(bytearray(payload))
+
+    assert packet.type == PacketType.UPDATE
+    assert packet.update_type == UpdateType.SEND_ITEMS_DATA
+    assert zlib_decompress(packet.extra_data) == items_data.to_bytes().data
+
+    items_data[2].name = "Not Dirt"
+    edited = items_data.to_update_packet()
+
+    assert edited.obj is not payload.obj
+    assert items_data.hash == hash_data(items_data.to_bytes().data)
+    assert items_data.to_update_packet().obj is edited.obj
+
+
+def test_world():
+    world = World("TEST", 4, 3)
+    world.foreground[world.index(1, 2)] = 2
+    world.background[world.index(1, 2)] = 14
+    world.set_lock_index(1, 2, 5)
+    world.set_extra(0, 0, TileExtraType.SIGN, ["hello", -1])
+    world.set_extra(3, 2, TileExtraType.LOCK, [0, 1234, (1, 2, 3), bytes(8)])
+
+    data = world.to_bytes().data
+    loaded = World.load(Buffer(data + b"tail"))
+
+    assert (loaded.name, loaded.width, loaded.height, len(loaded)) == ("TEST", 4, 3, 12)
+    assert loaded._columns is None  # not decoded yet
+    assert loaded.to_bytes().data == data + b"tail"
+
+    assert loaded.foreground_item(1, 2, ItemsData.load("data/items.dat")).name.lower() == "dirt"
+    assert loaded.tile_flags[loaded.index(1, 2)] == TileFlags.LOCKED
+    assert loaded.lock_index(1, 2) == 5 and loaded.lock_index(0, 0) is None
+    assert loaded.extra(0, 0) == (TileExtraType.SIGN, ["hello", -1])
+    assert loaded.extra(3, 2) == (TileExtraType.LOCK, [0, 1234, (1, 2, 3), bytes(8)])
+    assert loaded.item_counts() == {2: 1, 14: 1}
+    assert loaded.missing_items(ItemsData(None, [])) == [2, 14]
+
+    loaded.foreground[0] = 3
+    loaded.set_extra(0, 0, None)
+    reloaded = World.from_packet(loaded.to_update_packet())
+
+    assert reloaded.foreground[0] == 3 and reloaded.extra(0, 0) is None
+    assert reloaded.extra(3, 2) == loaded.extra(3, 2)
+
+    with pytest.raises(IndexError):
+        world.index(4, 0)
+
+    with pytest.raises(ValueError):
+        world.set_extra(0, 0, TileExtraType.DICE, [])
+
+
+def test_tile_update_coalescer():
+    world = World("TEST", 50, 2)
+    coalescer = TileUpdateCoalescer(world, max_packet_size=512)
+
+    for x in range(50):
+        world.foreground[world.index(x, 1)] = 2
+        coalescer.update(x, 1)
+        coalescer.update(x, 1)
+
+    assert len(coalescer) == 50
+    packets = coalescer.flush()
+
+    assert len(coalescer) == 0
+    assert all(packet.packed_size <= 512 for packet in packets)
+    assert {packet.update_type for packet in packets} == {UpdateType.SEND_TILE_UPDATE_DATA_MULTIPLE}
+    assert sum(packet.int_ for packet in packets) == 50
+    assert packets[0].extra_data[:16] == (
+        (0).to_bytes(4, "little") + (1).to_bytes(4, "little") + world.tile_bytes(0, 1)
+    )
+
+    metrics = coalescer.metrics
+    assert (metrics.updates, metrics.tiles, metrics.packets) == (100, 50, len(packets))
+    assert metrics.packets_saved == 100 - len(packets)
+    assert metrics.bytes_saved == metrics.unbatched_bytes - sum(p.packed_size for p in packets) > 0
+
+    coalescer.update(3, 0)
+    (packet,) = coalescer.flush()
+
+    assert packet.update_type == UpdateType.SEND_TILE_UPDATE_DATA
+    assert (packet.int_x, packet.int_y, packet.extra_data) == (3, 0, world.tile_bytes(3, 0))
+
+
+def test_player_tribute_data(tmp_path):
+    player_tribute_data = PlayerTributeData(
+        epic_players=["Seth", "Hamumu"], charity_champions=["Someone"]
+    )
+    player_tribute_data._tail = b"\x01\x02"
+
+    data = player_tribute_data.to_bytes().data
+    loaded = PlayerTributeData.load(data)
+
+    assert loaded.epic_players == ["Seth", "Hamumu"]
+    assert loaded.exceptional_mentors == [] and loaded.charity_champions == ["Someone"]
+    assert loaded.to_bytes().data == data
+    assert loaded.hash == hash_data(data)
+
+    path = tmp_path / "player_tribute.dat"
+    path.write_bytes(player_tribute_data.to_bytes(compress=True).data)
+
+    assert list(PlayerTributeData.iter_load(str(path), compressed=True, chunk_size=3)) == [
+        ("epic_players", "Seth"),
+        ("epic_players", "Hamumu"),
+        ("charity_champions", "Someone"),
+    ]
+
+    payload = loaded.to_update_packet()
+    assert loaded.to_update_packet() is payload
+
+    packet = UpdatePacket()
+    packet.unpack(bytearray(payload))
+
+    assert packet.update_type == UpdateType.SEND_PLAYER_TRIBUTE_DATA
+    assert zlib_decompress(packet.extra_data) == data
+
+    loaded.exceptional_mentors.append("Mentor")
+    assert loaded.to_update_packet() is not payload
+    assert loaded.hash == hash_data(loaded.to_bytes().data)
+
+    with pytest.raises(ValueError):
+        PlayerTributeData.load(data[:-8])
+
+
 if __name__ == "__main__":
     run(test_items_data_parser())
+    test_item_codec()
+    test_items_data_dirty_tracking()
+    test_items_data_caller_bytes()
+    test_items_data_interning()
+    test_punch_options()
+    test_items_data_lazy()
+    test_items_data_mmap()
+    test_items_data_parallel()
+    test_items_table()
+    test_items_data_hash()
+    test_xor_cipher()
+    test_items_data_iter_load()
+    test_items_data_patch()
+    test_items_data_update_packet()
+    test_world()
+    test_tile_update_coalescer()
@@ -1,5 +1,8 @@
+from asyncio import run
 from os import chdir, path
 
+import pytest
+
 import growtopia
 
 chdir(path.abspath(path.dirname(__file__)))
@@ -24,5 +27,136 @@ def test_protocol() -> None:
     packet = growtopia.UpdatePacket()
     assert packet.unpack(packet.pack()) == len(packet.pack())
 
+
+def test_update_packet_struct() -> None:
+    packet = growtopia.UpdatePacket(
+        update_type=growtopia.UpdateType.TILE_CHANGE_REQUEST,
+        object_type=-1,
+        net_id=5,
+        flags=growtopia.UpdateFlags.EXTRA_DATA,
+        vec_x=1.5,
+        int_y=-2,
+        extra_data=b"extra",
+    )
+    assert packet.to_bytes() == packet.pack()
+    assert packet.packed_size == len(packet.pack())
+
+    empty = growtopia.UpdatePacket()
+    assert empty.to_bytes() == empty.pack()
+
+    buffer = growtopia.UpdatePacket.pack_many([packet, empty])
+    packet.pack_into(buffer)
+    assert buffer.data == packet.pack() + empty.pack() + packet.pack()
+
+    unpacked, size = growtopia.UpdatePacket.unpack_from(buffer.data)
+    assert size == packet.packed_size
+    assert isinstance(unpacked.extra_data, memoryview) and unpacked.extra_data == b"extra"
+    assert (unpacked.net_id, unpacked.vec_x, unpacked.int_y) == (5, 1.5, -2)
+
+    packets = list(growtopia.UpdatePacket.unpack_many(buffer.data))
+    expected = [packet.to_bytes(), empty.to_bytes(), packet.to_bytes()]
+    assert [p.to_bytes() for p in packets] == expected
+
+    with growtopia.BUFFER_POOL.buffer() as pooled:  # empty, so falsy
+        assert growtopia.UpdatePacket.pack_many([packet, empty], pooled) is pooled
+        assert pooled.data == packet.pack() + empty.pack()
+
+    with pytest.raises(ValueError):
+        growtopia.UpdatePacket.unpack_from(buffer.data[:-1], buffer.size - packet.packed_size)
+
+
+def test_text_mapping() -> None:
+    packet = growtopia.TextPacket.from_mapping({"action": "input", "text": "a|b", "count": 2})
+    assert packet.type == growtopia.PacketType.TEXT
+    assert packet.text == "action|input\ntext|a|b\ncount|2\n"
+
+    assert packet.get("action") == "input"
+    assert packet.get("missing") is None
+    assert packet.get_mapping() is packet.get_mapping()
+    assert packet.get_mapping() == {"action": "input", "text": "a|b", "count": "2"}
+
+    packet.text = "action|quit\n"
+    assert packet.get("action") == "quit"
+
+    buffer = growtopia.Buffer()
+    growtopia.MessagePacket.write_mapping(buffer, {"action": "log", "msg": "xd"})
+    assert buffer.data == b"\x03\x00\x00\x00action|log\nmsg|xd\n"
+
+    mapping = growtopia.StrPacket.read_mapping(buffer.data + b"action|dupe\nno value\n")
+    assert mapping["action"] == "log"
+    assert "msg" in mapping and "no value" not in mapping
+    assert list(mapping.items()) == [("action", "log"), ("msg", "xd")]
+
+
+def test_variant_list() -> None:
+    packet = growtopia.ON_TALK_BUBBLE.to_packet(5, "hi")
+    assert packet.update_type == growtopia.UpdateType.CALL_FUNCTION
+
+    variants = growtopia.VariantList.from_packet(packet)
+    assert variants.function == "OnTalkBubble"
+    assert list(variants) == ["OnTalkBubble", 5, "hi"]
+    assert variants.type_of(1) == growtopia.VariantType.INT
+
+    call = growtopia.VariantCall("OnTest", growtopia.VariantType.UINT, "constant", (1.0, 2.0))
+    buffer = growtopia.Buffer()
+    call.write(buffer, 7)
+    assert bytes(buffer.data) == call.encode(7)
+
+    with pytest.raises(TypeError):
+        call.encode()
+
+    variants = growtopia.VariantList(buffer.data)
+    assert variants[-1] == (1.0, 2.0) and variants.type_of(1) == growtopia.VariantType.UINT
+
+    buffer = growtopia.Buffer()
+    growtopia.write_variants(buffer, ["OnTest", 7, "constant", (1.0, 2.0)])
+    assert list(growtopia.VariantList(buffer.data)) == ["OnTest", 7, "constant", (1.0, 2.0)]
+
+    with pytest.raises(ValueError):
+        growtopia.VariantList(buffer.data[:-1])[3]
+
+
+def test_packet_dispatcher() -> None:
+    dispatcher = growtopia.PacketDispatcher()
+    received = []
+
+    async def on_text(packet) -> None:
+        received.append(packet)
+
+    dispatcher.subscribe(on_text, growtopia.PacketType.TEXT)
+    dispatcher.subscribe(received.append, growtopia.PacketType.UPDATE)
+    dispatcher.subscribe(
+        received.append, growtopia.PacketType.UPDATE, growtopia.UpdateType.CALL_FUNCTION
+    )
+
+    text = growtopia.Buffer()
+    growtopia.TextPacket.write_mapping(text, {"action": "quit"})
+    call = growtopia.ON_CONSOLE_MESSAGE.to_packet("hi").to_bytes()
+
+    assert run(dispatcher.dispatch(text.data))
+    assert run(dispatcher.dispatch(call))
+    assert not run(dispatcher.dispatch(growtopia.Packet(growtopia.PacketType.HELLO).pack()))
+    assert not run(dispatcher.dispatch(b"\x07"))
+
+    # Cut short in the extra data & in the header, neither gets decoded.
+    assert not run(dispatcher.dispatch(call[:-1]))
+    assert not run(dispatcher.dispatch(call[:8]))
+
+    # Not utf-8, goes to UNKNOWN's instead of raising.
+    assert not run(dispatcher.dispatch(b"\x02\x00\x00\x00action|\xff\xfe\n"))
+
+    assert isinstance(received[0], growtopia.TextPacket) and received[0].get("action") == "quit"
+    assert len(received) == 3 and received[1] is received[2]
+    assert growtopia.VariantList.from_packet(received[1]).function == "OnConsoleMessage"
+
+    assert dispatcher.counters() == {"UNKNOWN": 4, "HELLO": 1, "TEXT": 1, "UPDATE/CALL_FUNCTION": 1}
+
+    dispatcher.unsubscribe(on_text, growtopia.PacketType.TEXT)
+    assert not run(dispatcher.dispatch(text.data))
+
+    dispatcher.reset_counters()
+    assert dispatcher.counters() == {}
+
+
 if __name__ == "__main__":
     test_protocol()
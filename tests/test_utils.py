@@ -0,0 +1,96 @@
+from struct import (
+    Struct,
+    error,
+)
+
+import pytest
+
+from growtopia import (
+    Buffer,
+    BufferPool,
+)
+
+
+def test_buffer():
+    buffer = Buffer()
+    buffer.write_int(0x1234, 2)
+    buffer.write_int(0xDEADBEEF, 4, "big")
+    buffer.write_int(0x123456, 3)
+    buffer.write_float(1.5)
+    buffer.write_struct("<IH", 7, 8)
+    buffer.write_struct(Struct("<HH"), 1, 2)
+    buffer.write_struct(Struct("<HH"), 3, 4)
+
+    buffer.reset_offset()
+
+    assert buffer.read_int(2) == 0x1234
+    assert buffer.read_int(4, "big") == 0xDEADBEEF
+    assert buffer.read_int(3) == 0x123456
+    assert buffer.read_float() == 1.5
+    assert buffer.read_struct("<IH") == (7, 8)
+    assert buffer.read_many(Struct("<HH"), 2) == [(1, 2), (3, 4)]
+    assert buffer.size_remaining == 0
+
+    # Past the end reads what's left, like it always has.
+    assert buffer.read_int() == 0
+
+    with pytest.raises(error):
+        buffer.read_many("<I", 1)
+
+
+def test_buffer_view():
+    buffer = Buffer(bytearray(b"\x01\x02\x03\x04"))
+
+    assert buffer.view is buffer.view
+    assert buffer.view.readonly
+
+    buffer.skip(1)
+
+    assert bytes(buffer.view_at_offset) == buffer.data_at_offset == b"\x02\x03\x04"
+
+    # The cached view doesn't get in the way of writing.
+    buffer.write(b"\x05")
+
+    assert bytes(buffer.view) == b"\x01\x02\x03\x04\x05"
+
+
+def test_buffer_reserve():
+    buffer = Buffer()
+    buffer.reserve(16)
+
+    assert len(buffer) == 0 and buffer.capacity == 16
+
+    buffer.write_int(1, 2)
+    buffer.write_struct("<I", 2)
+    buffer.write(b"abc")
+    buffer.write_many([b"de", memoryview(b"fg")])
+
+    assert len(buffer) == 13 and buffer.capacity == 16
+    assert buffer.read_int(8) == 0  # the reserved room isn't readable
+
+    buffer.write(b"hijkl")  # more than there's room for
+
+    assert buffer.data == b"\x01\x00\x02\x00\x00\x00abcdefghijkl"
+    assert buffer.capacity == len(buffer) == 18
+
+
+def test_buffer_pool():
+    pool = BufferPool(max_buffers=1)
+
+    with pool.buffer(1024) as buffer:
+        buffer.write(b"x" * 1000)
+        data = buffer.data
+
+    assert len(pool) == 1
+
+    with pool.buffer(512) as reused:
+        assert reused is buffer
+        assert len(reused) == 0 and reused.size_remaining == 0
+
+        reused.write(b"y" * 600)
+
+        assert reused.data is data and reused.data == b"y" * 600
+
+    pool.release(Buffer())
+
+    assert len(pool) == 1